@@ -0,0 +1,99 @@
+from engine import WIDTH, BALL_RADIUS
+
+# An opponent that works out where the ball will cross its baseline instead of
+# chasing the ball's current x. The side walls are unfolded analytically, so the
+# prediction costs the same however many bounces the ball will make, and it is only
+# recomputed when a paddle changes the ball's velocity.
+
+
+class AiDifficulty:
+    def __init__(self, reaction_ticks, error, speed, aim=0):
+        self.reaction_ticks = reaction_ticks  # Ticks before the AI reacts to a new shot
+        self.error = error  # The AI misjudges the landing point by up to this many pixels
+        self.speed = speed  # Pixels per tick the AI can move
+        self.aim = aim  # How far off the paddle centre it meets the ball to angle the return
+
+
+DIFFICULTIES = {
+    "easy": AiDifficulty(reaction_ticks=20, error=60, speed=3),
+    "medium": AiDifficulty(reaction_ticks=10, error=30, speed=5, aim=20),
+    "hard": AiDifficulty(reaction_ticks=3, error=8, speed=7, aim=40),
+}
+CLASSIC = "classic"  # The original ball-chasing handle_ai_movement
+OPPONENTS = [CLASSIC] + list(DIFFICULTIES)
+
+
+def fold(position, low, high):
+    # Where a point that travelled to position would be after bouncing between low and high
+    span = high - low
+    if span <= 0:
+        return low
+    offset = (position - low) % (2 * span)
+    if offset > span:
+        offset = 2 * span - offset
+    return low + offset
+
+
+def predict_intercept_x(x, y, x_vel, y_vel, target_y, radius=BALL_RADIUS, width=WIDTH):
+    # x at which a ball moving down reaches target_y, or None if it never will
+    if y_vel <= 0 or y >= target_y:
+        return None
+    time = (target_y - y) / y_vel
+    return fold(x + x_vel * time, radius, width - radius)
+
+
+class PredictiveAi:
+    def __init__(self, name, difficulty):
+        self.name = name
+        self.difficulty = difficulty
+        self.reset()
+
+    def reset(self):
+        # Velocity of the shot the current plan was made for; 0 when there is no plan
+        self.plan_y_vel = 0.0
+        self.plan_x_speed = 0.0
+        self.target_x = WIDTH / 2
+        self.ready_tick = 0.0
+
+    def plan(self, state):
+        ball = state.ball
+        player = state.right_player
+        self.plan_y_vel = ball.y_vel
+        self.plan_x_speed = abs(ball.x_vel)
+        landing = predict_intercept_x(ball.x, ball.y, ball.x_vel, ball.y_vel, player.y - ball.radius, ball.radius)
+        if landing is None:
+            landing = ball.x
+        error = self.difficulty.error
+        if error:
+            landing += state.rng.uniform(-error, error)
+        # Meet the ball off-centre so the return goes away from the opponent
+        opponent = state.left_player
+        away = 1 if opponent.x + opponent.width / 2 < WIDTH / 2 else -1
+        self.target_x = landing - away * self.difficulty.aim
+        self.ready_tick = state.tick + self.difficulty.reaction_ticks
+
+    def update(self, state):
+        ball = state.ball
+        player = state.right_player
+
+        if state.serving or ball.y_vel <= 0:
+            # Nothing is coming; drift back to the middle and wait for the next shot
+            self.plan_y_vel = 0.0
+            target = WIDTH / 2
+        else:
+            # Wall bounces only flip x_vel, so the plan survives them; a paddle hit changes y_vel or the speed
+            if ball.y_vel != self.plan_y_vel or abs(ball.x_vel) != self.plan_x_speed:
+                self.plan(state)
+            if state.tick < self.ready_tick:
+                return
+            target = self.target_x
+
+        centre = player.x + player.width / 2
+        move = max(-self.difficulty.speed, min(self.difficulty.speed, target - centre))
+        player.x = max(0, min(WIDTH - player.width, player.x + move))
+
+
+def make_ai(name):
+    if name == CLASSIC:
+        return None  # MatchState falls back to handle_ai_movement
+    return PredictiveAi(name, DIFFICULTIES[name])
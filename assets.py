@@ -0,0 +1,90 @@
+import os
+
+import pygame
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Loads every image once and keeps display-format copies of each size that is asked for
+class AssetRegistry:
+    def __init__(self, base_dir=ASSET_DIR):
+        self.base_dir = base_dir
+        self._decoded = {}  # path -> surface straight from the image file
+        self._surfaces = {}  # (path, size, alpha, smooth) -> (display key, converted surface)
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _resolve(self, path):
+        if os.path.isabs(path):
+            return path
+        return os.path.join(self.base_dir, path)
+
+    def _display_key(self):
+        # Identifies the current video mode; converted surfaces are only valid for the mode they were made for
+        display = pygame.display.get_surface() if pygame.display.get_init() else None
+        if display is None:
+            return None
+        return (id(display), display.get_size(), display.get_bitsize(), display.get_masks())
+
+    def _decode(self, path):
+        decoded = self._decoded.get(path)
+        if decoded is None:
+            decoded = pygame.image.load(self._resolve(path))
+            self._decoded[path] = decoded
+        return decoded
+
+    def _build(self, path, size, alpha, smooth, display_key):
+        surface = self._decode(path)
+        if size is not None and surface.get_size() != size:
+            if smooth and surface.get_bitsize() in (24, 32):  # smoothscale only handles true colour
+                surface = pygame.transform.smoothscale(surface, size)
+            else:
+                surface = pygame.transform.scale(surface, size)
+        if display_key is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        return surface
+
+    def image(self, path, size=None, alpha=True, smooth=False):
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (path, size, alpha, smooth)
+        display_key = self._display_key()
+        entry = self._surfaces.get(key)
+
+        if entry is not None and entry[0] == display_key:
+            self.hits += 1
+            return entry[1]
+
+        if entry is None:
+            self.misses += 1
+        else:
+            # The display mode changed since this entry was converted
+            self.reloads += 1
+
+        surface = self._build(path, size, alpha, smooth, display_key)
+        self._surfaces[key] = (display_key, surface)
+        return surface
+
+    def preload(self, entries):
+        # (path, size, alpha) or (path, size, alpha, smooth) tuples
+        for entry in entries:
+            self.image(*entry)
+
+    def clear(self, decoded=True):
+        # decoded=False keeps the images read from disk and drops only the sized, converted copies
+        if decoded:
+            self._decoded.clear()
+        self._surfaces.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "decoded": len(self._decoded),
+            "entries": len(self._surfaces),
+        }
+
+
+ASSETS = AssetRegistry()
@@ -0,0 +1,159 @@
+import numpy as np
+
+from engine import (
+    WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, BALL_RADIUS, POWER_MIN, BOUNCE_MAX_SPEED, BOUNCE_DEFLECTION,
+    Player, InputKeys, handle_player_movement_anywhere,
+)
+from timestep import TICK_RATE
+
+# The ball machine drill: a machine at the bottom of the court keeps firing balls at
+# the player, up to thousands at once. Balls are columns of preallocated arrays rather
+# than Ball objects; live balls are kept packed at the front, so a finished ball's slot
+# is reused by the next one fired and every rule is one NumPy operation over [:count].
+
+MODE_BALL_MACHINE = "ball_machine"
+MAX_BALLS = 4096
+DEFAULT_RATE = 20  # Balls fired per second
+MIN_RATE, MAX_RATE = 1, 2048
+MACHINE_X, MACHINE_Y = WIDTH // 2, HEIGHT - 40
+SPREAD = 60  # Pixels either side of the machine that balls leave from
+LAUNCH_SPEED = (6.0, 12.0)  # Upward pixels per tick
+LAUNCH_ANGLE = 4.0  # Most sideways pixels per tick at launch
+
+
+class BallMachineState:
+    FIELDS = ("x", "y", "x_vel", "y_vel", "previous_x", "previous_y")
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=MAX_BALLS, seed=None):
+        self.mode = MODE_BALL_MACHINE
+        self.player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.radius = BALL_RADIUS
+        self.capacity = capacity
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(capacity, dtype=np.float64))
+        self.count = 0  # Live balls, in slots [0, count)
+        self.rate = rate
+        self.rng = np.random.default_rng(seed)
+        self.due = 0.0  # Balls owed to the machine's firing rate
+
+        self.tick = 0
+        self.fired = 0
+        self.forehands = 0
+        self.backhands = 0
+        self.misses = 0  # Balls that got past the paddle
+        self.dropped = 0  # Balls not fired because every slot was in use
+
+        # What ModeScene and the HUD expect of a state
+        self.serving = False
+        self.power_level = POWER_MIN
+        self.finished = False
+
+    @property
+    def players(self):
+        return [self.player]
+
+    @property
+    def scores(self):
+        return self.forehands + self.backhands, self.misses
+
+    def live(self, field):
+        return getattr(self, field)[:self.count]
+
+
+def fire(state, count):
+    # Fills the next free slots; nothing is allocated
+    start = state.count
+    free = state.capacity - start
+    state.dropped += max(0, count - free)
+    count = min(count, free)
+    if count <= 0:
+        return
+    end = start + count
+    rng = state.rng
+    state.x[start:end] = MACHINE_X + rng.uniform(-SPREAD, SPREAD, count)
+    state.y[start:end] = MACHINE_Y
+    state.x_vel[start:end] = rng.uniform(-LAUNCH_ANGLE, LAUNCH_ANGLE, count)
+    state.y_vel[start:end] = -rng.uniform(*LAUNCH_SPEED, count)
+    state.previous_x[start:end] = state.x[start:end]
+    state.previous_y[start:end] = state.y[start:end]
+    state.count = end
+    state.fired += count
+
+
+def retire(state, done):
+    # Packs the balls still in play to the front; done is a mask over the live slots
+    keep = ~done
+    remaining = int(keep.sum())
+    for field in state.FIELDS:
+        values = getattr(state, field)
+        values[:remaining] = values[:state.count][keep]
+    state.count = remaining
+
+
+def paddle_collision(state):
+    # Every ball whose top edge crossed the paddle's face this tick while rising, tested
+    # along its path so fast balls can't skip the 20 px paddle. Returns the hit mask.
+    player, radius = state.player, state.radius
+    x, y, x_vel, y_vel = state.live("x"), state.live("y"), state.live("x_vel"), state.live("y_vel")
+    face = player.y + player.height + radius
+    start_y = y - y_vel
+    rising = y_vel < 0
+    crossed = rising & (start_y >= face) & (y < face)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contact_x = x - x_vel + x_vel * (start_y - face) / -y_vel
+    hit = crossed & (player.x <= contact_x) & (contact_x <= player.x + player.width)
+    if not hit.any():
+        return hit
+
+    contact = contact_x[hit]
+    y[hit] = face
+    y_vel[hit] *= -1
+    x_vel[hit] = np.clip(np.floor_divide(contact - (player.x + player.width // 2), BOUNCE_DEFLECTION),
+                         -BOUNCE_MAX_SPEED, BOUNCE_MAX_SPEED)
+    forehand = contact <= player.x + player.width // 2
+    state.forehands += int(forehand.sum())
+    state.backhands += int((~forehand).sum())
+    return hit
+
+
+# Advances the ball machine by one tick
+def step_ball_machine(state, inputs):
+    handle_player_movement_anywhere(InputKeys(inputs), state.player)
+
+    state.due += state.rate / TICK_RATE
+    if state.due >= 1:
+        fire(state, int(state.due))
+        state.due -= int(state.due)
+
+    count = state.count
+    x, y = state.x[:count], state.y[:count]
+    x_vel, y_vel = state.x_vel[:count], state.y_vel[:count]
+    state.previous_x[:count] = x
+    state.previous_y[:count] = y
+    x += x_vel
+    y += y_vel
+
+    radius = state.radius
+    right_wall = x + radius >= WIDTH
+    left_wall = x - radius <= 0
+    x[right_wall] = WIDTH - radius
+    x[left_wall] = radius
+    x_vel[right_wall | left_wall] *= -1
+
+    paddle_collision(state)
+
+    past_player = y - radius <= 0
+    returned = y - radius > HEIGHT
+    state.misses += int(past_player.sum())
+    done = past_player | returned
+    if done.any():
+        retire(state, done)
+    state.tick += 1
+
+
+def sprite_positions(state, alpha, scale=1):
+    # Top-left corners of the live balls' sprites part way between the last two ticks, in canvas pixels
+    previous_x, previous_y = state.live("previous_x"), state.live("previous_y")
+    x = previous_x + (state.live("x") - previous_x) * alpha - state.radius
+    y = previous_y + (state.live("y") - previous_y) * alpha - state.radius
+    return (x * scale).astype(np.int32), (y * scale).astype(np.int32)
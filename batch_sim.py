@@ -0,0 +1,165 @@
+import numpy as np
+
+from engine import (
+    WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, BALL_RADIUS, POWER_MIN, POWER_MAX,
+    AI_VEL, AI_JITTER, BOUNCE_MAX_SPEED, BOUNCE_DEFLECTION,
+    Ball,
+)
+
+# Plays out many rallies at once. Every ball and paddle lives in a column of a
+# structure-of-arrays buffer, and each rule from engine.py is applied to all of
+# them with masked NumPy updates instead of one Python object per ball.
+
+LEFT = 0
+RIGHT = 1
+UNFINISHED = -1
+
+
+class RallyBatch:
+    FIELDS = ("ball_x", "ball_y", "ball_x_vel", "ball_y_vel", "left_x", "left_y", "right_x", "right_y")
+
+    def __init__(self, count):
+        self.ball_x = np.full(count, WIDTH // 2, dtype=np.float64)
+        self.ball_y = np.full(count, HEIGHT // 2, dtype=np.float64)
+        self.ball_x_vel = np.zeros(count, dtype=np.float64)
+        self.ball_y_vel = np.zeros(count, dtype=np.float64)
+        self.left_x = np.full(count, WIDTH // 2 - (PLAYER_WIDTH // 2), dtype=np.float64)
+        self.left_y = np.full(count, 10, dtype=np.float64)
+        self.right_x = np.full(count, WIDTH // 2 - (PLAYER_WIDTH // 2), dtype=np.float64)
+        self.right_y = np.full(count, HEIGHT - 10 - PLAYER_HEIGHT, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.ball_x)
+
+    def select(self, mask):
+        batch = RallyBatch.__new__(RallyBatch)
+        for field in self.FIELDS:
+            setattr(batch, field, getattr(self, field)[mask])
+        return batch
+
+
+def batch_collision(batch, radius=BALL_RADIUS, width=PLAYER_WIDTH, height=PLAYER_HEIGHT,
+                    max_speed=BOUNCE_MAX_SPEED, deflection=BOUNCE_DEFLECTION):
+    # Vectorised handle_collision; returns the masks of balls hit by each paddle
+    x, y = batch.ball_x, batch.ball_y
+    x_vel, y_vel = batch.ball_x_vel, batch.ball_y_vel
+
+    right_wall = x + radius >= WIDTH
+    left_wall = ~right_wall & (x - radius <= 0)
+    x[right_wall] = WIDTH - radius
+    x[left_wall] = radius
+    x_vel[right_wall | left_wall] *= -1
+
+    left_hit = (
+        (y_vel < 0)
+        & (batch.left_x <= x) & (x <= batch.left_x + width)
+        & (batch.left_y <= y - radius) & (y - radius <= batch.left_y + height)
+    )
+    right_hit = (
+        (y_vel > 0)
+        & (batch.right_x <= x) & (x <= batch.right_x + width)
+        & (batch.right_y <= y + radius) & (y + radius <= batch.right_y + height)
+    )
+
+    hit = left_hit | right_hit
+    paddle_x = np.where(left_hit, batch.left_x, batch.right_x)
+    y_vel[hit] *= -1
+    x_vel[hit] = np.floor_divide(x[hit] - (paddle_x[hit] + width // 2), deflection)
+    too_fast = hit & (np.abs(x_vel) > max_speed)
+    x_vel[too_fast] = np.sign(x_vel[too_fast]) * max_speed
+
+    return left_hit, right_hit
+
+
+def batch_ai_movement(ball_x, paddle_x, rng, ai_vel=AI_VEL, jitter=AI_JITTER, width=PLAYER_WIDTH):
+    # Vectorised handle_ai_movement, including its two sequential checks
+    target = ball_x + rng.integers(-jitter, jitter + 1, size=len(ball_x))
+    max_x = WIDTH - width
+
+    move_right = (paddle_x + (width // 2) < target) & (paddle_x + width + ai_vel <= max_x)
+    paddle_x[move_right] += ai_vel
+
+    move_left = (paddle_x + (width // 2) > target) & (paddle_x - ai_vel >= 0)
+    paddle_x[move_left] -= ai_vel
+
+
+class RallyStats:
+    def __init__(self, length, winner, hit_rally, hit_side, hit_offset, hit_x):
+        self.length = length  # Ticks from serve until the ball left the court
+        self.winner = winner  # LEFT, RIGHT or UNFINISHED
+        # One entry per paddle hit across all rallies
+        self.hit_rally = hit_rally
+        self.hit_side = hit_side
+        self.hit_offset = hit_offset  # Contact point relative to the paddle centre
+        self.hit_x = hit_x
+
+    def summary(self):
+        finished = self.winner != UNFINISHED
+        return {
+            "rallies": len(self.length),
+            "unfinished": int((~finished).sum()),
+            "left_win_rate": float((self.winner == LEFT).mean()) if len(self.length) else 0.0,
+            "right_win_rate": float((self.winner == RIGHT).mean()) if len(self.length) else 0.0,
+            "mean_length": float(self.length[finished].mean()) if finished.any() else 0.0,
+            "hits": len(self.hit_rally),
+        }
+
+
+# Both paddles are driven by the handle_ai_movement rules; the left player serves every rally
+def simulate_rallies(count, seed=None, serve_power=None, max_ticks=5000,
+                     ai_vel=AI_VEL, jitter=AI_JITTER, max_speed=BOUNCE_MAX_SPEED, deflection=BOUNCE_DEFLECTION):
+    rng = np.random.default_rng(seed)
+    if serve_power is None:
+        serve_power = rng.uniform(POWER_MIN, POWER_MAX, size=count)
+
+    batch = RallyBatch(count)
+    batch.ball_y[:] = batch.left_y + PLAYER_HEIGHT
+    batch.ball_x[:] = batch.left_x + PLAYER_WIDTH // 2
+    batch.ball_y_vel[:] = Ball.MAX_VEL * np.broadcast_to(serve_power, (count,))
+
+    ids = np.arange(count)
+    length = np.zeros(count, dtype=np.int64)
+    winner = np.full(count, UNFINISHED, dtype=np.int8)
+    hits = []
+
+    for tick in range(1, max_ticks + 1):
+        if not len(ids):
+            break
+
+        batch_ai_movement(batch.ball_x, batch.left_x, rng, ai_vel, jitter)
+        batch_ai_movement(batch.ball_x, batch.right_x, rng, ai_vel, jitter)
+
+        batch.ball_x += batch.ball_x_vel
+        batch.ball_y += batch.ball_y_vel
+        left_hit, right_hit = batch_collision(batch, max_speed=max_speed, deflection=deflection)
+
+        for side, hit, paddle_x in ((LEFT, left_hit, batch.left_x), (RIGHT, right_hit, batch.right_x)):
+            if hit.any():
+                # The contact point is the wall-clamped x that the deflection rule used
+                hits.append((ids[hit], side, batch.ball_x[hit] - (paddle_x[hit] + PLAYER_WIDTH // 2), batch.ball_x[hit]))
+
+        out_top = batch.ball_y < 0
+        out_bottom = batch.ball_y > HEIGHT
+        done = out_top | out_bottom
+        if done.any():
+            length[ids[done]] = tick
+            winner[ids[out_top]] = RIGHT
+            winner[ids[out_bottom]] = LEFT
+            keep = ~done
+            ids = ids[keep]
+            batch = batch.select(keep)
+
+    length[ids] = max_ticks
+
+    if hits:
+        hit_rally = np.concatenate([entry[0] for entry in hits])
+        hit_side = np.concatenate([np.full(len(entry[0]), entry[1], dtype=np.int8) for entry in hits])
+        hit_offset = np.concatenate([entry[2] for entry in hits])
+        hit_x = np.concatenate([entry[3] for entry in hits])
+    else:
+        hit_rally = np.zeros(0, dtype=np.int64)
+        hit_side = np.zeros(0, dtype=np.int8)
+        hit_offset = np.zeros(0)
+        hit_x = np.zeros(0)
+
+    return RallyStats(length, winner, hit_rally, hit_side, hit_offset, hit_x)
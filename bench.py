@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs headless under the SDL dummy video driver so it works on build machines
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+from ballmachine import BallMachineState, step_ball_machine
+from graphics import GRAPHICS
+from engine import (
+    WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, BALL_RADIUS, MODE_VS_AI,
+    INPUT_SERVE_PRESS, INPUT_SERVE_RELEASE,
+    Player, Ball, MatchState, simulate,
+    handle_collision, handle_swept_collision, handle_forehand_collision, handle_backhand_collision,
+    handle_ai_movement,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.25  # Fail when a metric is this much worse than the baseline
+
+# Metric name -> True when bigger numbers are better
+METRICS = {
+    "draw_full_fps": True,
+    "draw_dirty_fps": True,
+    "draw_medium_fps": True,
+    "draw_low_fps": True,
+    "ball_machine_1000_fps": True,
+    "handle_collision_per_sec": True,
+    "handle_swept_collision_per_sec": True,
+    "handle_forehand_collision_per_sec": True,
+    "handle_backhand_collision_per_sec": True,
+    "handle_ai_movement_per_sec": True,
+    "vs_ai_match_ticks_per_sec": True,
+    "startup_to_menu_ms": False,
+}
+
+
+def measure(function, min_time=0.3, repeat=3):
+    # Best rate over a few runs of at least min_time seconds each, in calls per second
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        batch = 1
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                function()
+            calls += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            batch *= 2
+        best = max(best, calls / elapsed)
+    return best
+
+
+def court():
+    left_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
+    right_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), HEIGHT - 10 - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
+    ball = Ball(WIDTH // 2, HEIGHT // 2, BALL_RADIUS)
+    return left_player, right_player, ball
+
+
+def bench_draw(dirty, quality="high"):
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    GRAPHICS.set(quality)
+    main.load_game_assets()
+    renderer = main.create_renderer(win) if dirty else None
+    state = MatchState(MODE_VS_AI)
+    state.ball.x_vel = 3
+    state.ball.y_vel = 4
+
+    def frame():
+        state.ball.move()
+        if not 0 < state.ball.y < HEIGHT:
+            state.ball.y_vel *= -1
+        if not 0 < state.ball.x < WIDTH:
+            state.ball.x_vel *= -1
+        main.draw_state(win, state, renderer)
+
+    return measure(frame)
+
+
+def bench_ball_machine(balls=1000):
+    # Ball machine frames (one tick and a dirty-rect draw) with this many balls in play
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    GRAPHICS.set("high")
+    main.load_game_assets()
+    renderer = main.create_renderer(win)
+    # Fired faster than balls leave, so every slot stays in use
+    state = BallMachineState(rate=balls, capacity=balls, seed=4)
+    while state.tick < 300:
+        step_ball_machine(state, 0)
+
+    def frame():
+        step_ball_machine(state, 0)
+        main.draw_ball_machine(win, state, 0.5, renderer)
+
+    return measure(frame)
+
+
+def bench_collision(handler):
+    left_player, right_player, ball = court()
+    rng = random.Random(1)
+    positions = [(rng.randint(0, WIDTH), rng.randint(0, HEIGHT), rng.uniform(-8, 8), rng.choice((-27, -6, 6, 27)))
+                 for _ in range(1024)]
+    index = [0]
+
+    def call():
+        ball.x, ball.y, ball.x_vel, ball.y_vel = positions[index[0] & 1023]
+        index[0] += 1
+        handler(ball, left_player, right_player)
+
+    return measure(call)
+
+
+def bench_drill_collision(handler):
+    player, _, ball = court()
+    rng = random.Random(2)
+    positions = [(rng.randint(0, WIDTH), rng.randint(0, 60), rng.uniform(-8, 8), rng.choice((-15, 15)))
+                 for _ in range(1024)]
+    index = [0]
+
+    def call():
+        ball.x, ball.y, ball.x_vel, ball.y_vel = positions[index[0] & 1023]
+        ball.last_collision_time = -10.0
+        index[0] += 1
+        handler(ball, player, 0, now=0.0)
+
+    return measure(call)
+
+
+def bench_ai_movement():
+    _, right_player, ball = court()
+    rng = random.Random(3)
+
+    def call():
+        ball.x = rng.randint(0, WIDTH)
+        handle_ai_movement(ball, right_player, rng)
+
+    return measure(call)
+
+
+def bench_match():
+    # Whole VS AI matches with a scripted server, counted in simulated ticks per second
+    def server(state):
+        if state.serving:
+            if not state.holding_space:
+                return INPUT_SERVE_PRESS
+            return INPUT_SERVE_RELEASE if state.rng.random() < 0.05 else 0
+        return 0
+
+    best = 0.0
+    for seed in range(3):
+        start = time.perf_counter()
+        state = simulate(MatchState(MODE_VS_AI, seed), server, max_ticks=200000)
+        best = max(best, state.tick / (time.perf_counter() - start))
+    return best
+
+
+def bench_startup(repeat=3):
+    # Cold start of main.py until the first menu frame has been shown; no stats database is
+    # touched and no audio device opened, so benchmarking leaves nothing behind
+    best = None
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, script, "--startup-profile", "--no-font-cache", "--no-stats", "--no-sound"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            for line in process.stdout:
+                if line.startswith("total"):
+                    break
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            process.kill()
+            process.wait()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmarks():
+    return {
+        "draw_full_fps": bench_draw(dirty=False),
+        "draw_dirty_fps": bench_draw(dirty=True),
+        "draw_medium_fps": bench_draw(dirty=True, quality="medium"),
+        "draw_low_fps": bench_draw(dirty=True, quality="low"),
+        "ball_machine_1000_fps": bench_ball_machine(),
+        "handle_collision_per_sec": bench_collision(handle_collision),
+        "handle_swept_collision_per_sec": bench_collision(handle_swept_collision),
+        "handle_forehand_collision_per_sec": bench_drill_collision(handle_forehand_collision),
+        "handle_backhand_collision_per_sec": bench_drill_collision(handle_backhand_collision),
+        "handle_ai_movement_per_sec": bench_ai_movement(),
+        "vs_ai_match_ticks_per_sec": bench_match(),
+        "startup_to_menu_ms": bench_startup(),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Returns (metric, baseline, result, change) for every metric that got worse than threshold,
+    # and the metrics that were measured but have nothing in the baseline to be checked against
+    regressions = []
+    unchecked = []
+    for metric, higher_is_better in METRICS.items():
+        if metric not in results:
+            continue
+        if not baseline.get(metric):
+            unchecked.append(metric)
+            continue
+        change = (results[metric] - baseline[metric]) / baseline[metric]
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            regressions.append((metric, baseline[metric], results[metric], change))
+    return regressions, unchecked
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Ace Academy performance benchmarks")
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON to FILE")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline (default %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="run the suite this many times and use each metric's median; "
+                             "single runs on a busy machine can swing past the threshold (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    runs = [run_benchmarks() for _ in range(max(args.runs, 1))]
+    results = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+    for metric, value in results.items():
+        print(f"{metric:<36}{value:14.1f}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against; run with --update-baseline first")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions, unchecked = compare(results, baseline, args.threshold)
+    for metric in unchecked:
+        print(f"WARNING {metric} is not in {args.baseline}, so it wasn't checked; run with --update-baseline")
+    for metric, before, after, change in regressions:
+        print(f"REGRESSION {metric}: {before:.1f} -> {after:.1f} ({change:+.1%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,199 @@
+import os
+import queue
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+# Records what the window shows, frame by frame, for coaching footage. The frame's pixels
+# are overwritten by the next one, so the game thread does make one copy: a memcpy through
+# the surface's buffer view into a free buffer from a fixed pool, with nothing allocated
+# or converted (a pixels3d view is strided and takes ~30 times longer to copy). Writer
+# threads turn buffers into PNG files, or stream them raw into an encoder's stdin, and
+# hand them back. When every buffer is still waiting the frame is dropped and counted
+# rather than making the game wait.
+#
+# PNGs are put together here with NumPy and zlib rather than pygame.image.save, which
+# holds the GIL for the whole encode and would stall the game thread; zlib lets go of it.
+
+POOL_FRAMES = 8  # Buffers in the pool, which bounds both the queue and the memory used
+PNG_WRITERS = 2
+PNG_LEVEL = 1  # zlib level; higher shrinks the files but takes several times longer
+
+# Raw pixel layouts an encoder can be told about, by the surface's red, green and blue masks
+PIXEL_FORMATS = {
+    (0xFF0000, 0xFF00, 0xFF): "bgr0",  # Little-endian XRGB, the usual display format
+    (0xFF, 0xFF00, 0xFF0000): "rgb0",
+}
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(pixels, size, pitch, channels, rows, level=PNG_LEVEL):
+    # pixels holds 32-bit pixels pitch bytes apart; channels are the byte offsets of red,
+    # green and blue. rows is scratch space of height x (1 + width * 3) bytes.
+    width, height = size
+    source = pixels.reshape(height, pitch)[:, :width * 4].reshape(height, width, 4)
+    rgb = rows[:, 1:].reshape(height, width, 3)
+    for index, channel in enumerate(channels):
+        rgb[..., index] = source[..., channel]
+    rows[:, 0] = 0  # No row filter
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8-bit RGB
+    return b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", header) + png_chunk(b"IDAT", zlib.compress(rows, level)) + png_chunk(b"IEND", b"")
+
+
+class FrameCapture:
+    def __init__(self):
+        self.enabled = False
+        self.directory = None
+        self.command = None
+        self.fps = 60
+        self.pool_frames = POOL_FRAMES
+        self.writers = []
+        self.process = None
+        self.buffers = []
+        self.free = queue.Queue()  # Indexes of buffers the game thread may fill
+        self.ready = queue.Queue()  # (buffer index, frame number) waiting to be written
+        self.size = None
+        self.pitch = 0
+        self.channels = None
+        self.frames = 0  # Frames handed to the writers
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+        self.lock = threading.Lock()
+
+    def start(self, directory=None, command=None, fps=60, pool_frames=POOL_FRAMES):
+        # Writes directory/frame-000000.png and so on, or runs command (formatted with
+        # {width}, {height}, {fps} and {pix_fmt}) and pipes raw frames to its stdin. Buffers
+        # and writers are set up on the first grab(), once the window exists.
+        self.directory = directory
+        self.command = command
+        self.fps = fps
+        self.pool_frames = pool_frames
+        self.enabled = True
+
+    def open(self, surface):
+        width, height = self.size = surface.get_size()
+        self.pitch = surface.get_pitch()
+        masks = surface.get_masks()[:3]
+        if surface.get_bytesize() != 4:
+            self.fail(ValueError(f"can only capture 32-bit displays, not {surface.get_bitsize()}-bit"))
+            return
+        self.channels = [(mask.bit_length() - 8) // 8 for mask in masks]  # Byte of each colour, little-endian
+        self.buffers = [np.empty(self.pitch * height, np.uint8) for _ in range(self.pool_frames)]
+        for index in range(self.pool_frames):
+            self.free.put(index)
+
+        if self.command is not None:
+            pix_fmt = PIXEL_FORMATS.get(masks)
+            if pix_fmt is None:
+                self.fail(ValueError(f"can't describe the display's pixel format to an encoder: {masks}"))
+                return
+            command = self.command.format(width=width, height=height, fps=self.fps, pix_fmt=pix_fmt)
+            try:
+                self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE)
+            except OSError as error:
+                self.fail(error)
+                return
+            # One thread, so frames reach the encoder in order
+            self.writers = [threading.Thread(target=self._pipe, name="capture-encoder", daemon=True)]
+        else:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError as error:
+                self.fail(error)
+                return
+            self.writers = [threading.Thread(target=self._write_png, name=f"capture-writer-{index}", daemon=True)
+                            for index in range(PNG_WRITERS)]
+        for writer in self.writers:
+            writer.start()
+
+    def grab(self, surface):
+        # Call after a frame is presented
+        if self.size is None:
+            self.open(surface)
+        if self.error is not None or surface.get_size() != self.size or surface.get_pitch() != self.pitch:
+            self.dropped += 1
+            return
+        try:
+            index = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1  # The writers are behind
+            return
+        view = surface.get_buffer()  # Locks the surface until released
+        np.copyto(self.buffers[index], np.frombuffer(view, np.uint8))
+        del view
+        self.ready.put((index, self.frames))
+        self.frames += 1
+
+    def stop(self):
+        # Writes everything already grabbed, then ends the writers and the encoder
+        if not self.enabled:
+            return
+        self.enabled = False
+        for _ in self.writers:
+            self.ready.put(None)
+        for writer in self.writers:
+            writer.join()
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass  # The encoder already exited; fail() said so
+            self.process.wait()
+        self.writers = []
+        self.buffers = []
+
+    def _write_png(self):
+        width, height = self.size
+        rows = np.empty((height, 1 + width * 3), np.uint8)
+        while True:
+            item = self.ready.get()
+            if item is None:
+                return
+            index, number = item
+            data = encode_png(self.buffers[index], self.size, self.pitch, self.channels, rows)
+            self.free.put(index)
+            try:
+                with open(os.path.join(self.directory, f"frame-{number:06d}.png"), "wb") as png_file:
+                    png_file.write(data)
+                with self.lock:
+                    self.written += 1
+            except OSError as error:
+                self.fail(error)
+
+    def _pipe(self):
+        width, height = self.size
+        while True:
+            item = self.ready.get()
+            if item is None:
+                return
+            index, _ = item
+            frame = self.buffers[index]
+            if self.pitch != width * 4:
+                frame = frame.reshape(height, self.pitch)[:, :width * 4].tobytes()  # Drop the row padding
+            try:
+                self.process.stdin.write(frame)
+                self.written += 1
+            except OSError as error:
+                self.fail(error)
+            self.free.put(index)
+
+    def fail(self, error):
+        # Later frames are dropped; the game carries on
+        if self.error is None:
+            self.error = error
+            print(f"capture stopped: {error}", file=sys.stderr)
+
+    def stats(self):
+        return {"frames": self.frames, "written": self.written, "dropped": self.dropped, "queued": self.ready.qsize()}
+
+
+CAPTURE = FrameCapture()
@@ -0,0 +1,628 @@
+import random
+
+import pygame
+
+from assets import ASSETS
+from profiler import PROFILER
+from sound import SOUNDS, SOUND_BOUNCE, SOUND_HIT, SOUND_POINT, SOUND_SERVE
+from sweep import KIND_PADDLE, Zone, sweep
+from timestep import TICK_RATE
+
+# Game rules shared by every mode. Nothing here needs a display, so matches can be
+# stepped headless for analysis and testing as fast as the CPU allows.
+
+# Game constants
+WIDTH, HEIGHT = 1063, 1001
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+PLAYER_WIDTH, PLAYER_HEIGHT = 100, 20
+BALL_RADIUS = 7
+WINNING_SCORE = 10
+POWER_MIN = 0.025
+POWER_MAX = 4.5
+POWER_INCREMENT = 0.175
+AI_VEL = 2
+AI_JITTER = 25  # The AI aims up to this many pixels either side of the ball
+BOUNCE_MAX_SPEED = 8  # Largest sideways speed a paddle hit can give the ball
+BOUNCE_DEFLECTION = 20  # Pixels off the paddle centre per unit of sideways speed
+BALL_IMAGE = "tennis_ball.png"
+CONTINUOUS_COLLISIONS = True  # Sweep the ball's path each tick instead of testing where it lands
+
+# Player and Ball Classes
+class Player:
+    COLOR = BLACK
+    VEL = 6
+
+    def __init__(self, x, y, width, height):
+        self.x = self.original_x = x
+        self.y = self.original_y = y
+        self.width = width
+        self.height = height
+
+    def draw(self, win, scale=1):
+        # scale maps court coordinates onto a reduced-resolution canvas
+        return pygame.draw.rect(win, self.COLOR, (self.x * scale, self.y * scale, self.width * scale, self.height * scale))
+
+    def move(self, right=True):
+        if right:
+            self.x += self.VEL
+        else:
+            self.x -= self.VEL
+
+    def reset(self):
+        self.x = self.original_x
+        self.y = self.original_y
+
+
+class Ball:
+    MAX_VEL = 6
+    COLOR = BLACK
+
+    def __init__(self, x, y, radius, image_path=BALL_IMAGE):
+        self.x = self.original_x = x
+        self.y = self.original_y = y
+        self.radius = radius
+        self.x_vel = 0
+        self.y_vel = -self.MAX_VEL
+        self.image_path = image_path
+        self.last_collision_time = 0.0  # Game seconds; the drills' hit cooldown counts from here
+        self.last_contact = None  # Where the ball last touched the paddle in a drill
+
+    @property
+    def image(self):
+        # Shared, display-converted sprite from the asset registry
+        return ASSETS.image(self.image_path, (self.radius * 2, self.radius * 2))
+
+    def draw(self, win, scale=1):
+        if scale == 1:
+            return win.blit(self.image, (self.x - self.radius, self.y - self.radius))
+        size = self.radius * 2 * scale
+        return win.blit(ASSETS.image(self.image_path, (size, size)), ((self.x - self.radius) * scale, (self.y - self.radius) * scale))
+
+    def move(self):
+        self.x += self.x_vel
+        self.y += self.y_vel
+
+    def reset(self):
+        self.x = self.original_x
+        self.y = self.original_y
+        self.y_vel *= -1
+        self.x_vel = 0
+
+
+
+def handle_collision(ball, left_player, right_player):
+    MAX_SPEED = BOUNCE_MAX_SPEED
+
+    if ball.x + ball.radius >= WIDTH:
+        ball.x = WIDTH - ball.radius
+        ball.x_vel *= -1
+        if SOUNDS.enabled:
+            SOUNDS.play(SOUND_BOUNCE)
+    elif ball.x - ball.radius <= 0:
+        ball.x = ball.radius
+        ball.x_vel *= -1
+        if SOUNDS.enabled:
+            SOUNDS.play(SOUND_BOUNCE)
+
+    if ball.y_vel < 0:
+        if (
+            left_player.x <= ball.x <= left_player.x + left_player.width
+            and left_player.y <= ball.y - ball.radius <= left_player.y + left_player.height
+        ):
+            ball.y_vel *= -1
+            ball.x_vel = (ball.x - (left_player.x + left_player.width // 2)) // BOUNCE_DEFLECTION
+            if abs(ball.x_vel) > MAX_SPEED:
+                ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
+            if SOUNDS.enabled:
+                SOUNDS.play(SOUND_HIT)
+
+    elif ball.y_vel > 0:
+        if (
+            right_player.x <= ball.x <= right_player.x + right_player.width
+            and right_player.y <= ball.y + ball.radius <= right_player.y + right_player.height
+        ):
+            ball.y_vel *= -1
+            ball.x_vel = (ball.x - (right_player.x + right_player.width // 2)) // BOUNCE_DEFLECTION
+            if abs(ball.x_vel) > MAX_SPEED:
+                ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
+            if SOUNDS.enabled:
+                SOUNDS.play(SOUND_HIT)
+
+
+def handle_player_movement(keys, left_player, right_player):
+    if keys[pygame.K_d] and left_player.x + left_player.width + left_player.VEL <= WIDTH:
+        left_player.move(right=True)
+    if keys[pygame.K_a] and left_player.x - left_player.VEL >= 0:
+        left_player.move(right=False)
+
+    if keys[pygame.K_w] and left_player.y - left_player.VEL >= 0:
+        left_player.y -= left_player.VEL
+    if keys[pygame.K_s] and left_player.y + left_player.height + left_player.VEL <= HEIGHT // 2:
+        left_player.y += left_player.VEL
+
+    if keys[pygame.K_RIGHT] and right_player.x + right_player.width + right_player.VEL <= WIDTH:
+        right_player.move(right=True)
+    if keys[pygame.K_LEFT] and right_player.x - right_player.VEL >= 0:
+        right_player.move(right=False)
+
+    if keys[pygame.K_DOWN] and right_player.y + right_player.height + right_player.VEL <= HEIGHT:
+        right_player.y += right_player.VEL
+    if keys[pygame.K_UP] and right_player.y - right_player.VEL >= HEIGHT // 2:
+        right_player.y -= right_player.VEL
+
+
+def handle_ai_movement(ball, right_player, rng=random, ai_vel=AI_VEL, jitter=AI_JITTER):
+    ai_target_point = ball.x + rng.randint(-jitter, jitter)
+
+    min_x = 0
+    max_x = WIDTH - right_player.width
+
+    if right_player.x + (right_player.width // 2) < ai_target_point and right_player.x + right_player.width + ai_vel <= max_x:
+        right_player.x += ai_vel
+
+    if right_player.x + (right_player.width // 2) > ai_target_point and right_player.x - ai_vel >= min_x:
+        right_player.x -= ai_vel
+
+
+def handle_forehand_collision(ball, player, score, now, collision_cooldown=3):
+    forehand_zone_start = player.x
+    forehand_zone_end = player.x + (player.width // 2)
+
+    if now - ball.last_collision_time < collision_cooldown:
+        return score
+    MAX_SPEED = BOUNCE_MAX_SPEED
+
+    if player.x <= ball.x <= player.x + player.width and player.y <= ball.y - ball.radius <= player.y + player.height:
+        ball.y_vel *= -1
+        ball.last_collision_time = now
+        ball.last_contact = (ball.x, ball.y)
+        ball.x_vel = (ball.x - (player.x + player.width // 2)) // BOUNCE_DEFLECTION
+
+        if forehand_zone_start <= ball.x <= forehand_zone_end:
+            score += 1
+        if SOUNDS.enabled:
+            SOUNDS.play(SOUND_POINT if forehand_zone_start <= ball.x <= forehand_zone_end else SOUND_HIT)
+
+    bounced = False
+    if ball.x + ball.radius >= WIDTH:
+        ball.x = WIDTH - ball.radius
+        ball.x_vel *= -1
+        bounced = True
+    if ball.x - ball.radius <= 0:
+        ball.x = ball.radius
+        ball.x_vel *= -1
+        bounced = True
+
+    if ball.y + ball.radius >= HEIGHT:
+        ball.y = HEIGHT - ball.radius
+        ball.y_vel *= -1
+        bounced = True
+    if ball.y - ball.radius <= 0:
+        ball.y = ball.radius
+        ball.y_vel *= -1
+        bounced = True
+    if bounced and SOUNDS.enabled:
+        SOUNDS.play(SOUND_BOUNCE)
+
+    if abs(ball.x_vel) > MAX_SPEED:
+        ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
+
+    return score
+
+def handle_backhand_collision(ball, player, score, now, collision_cooldown=3):
+    backhand_zone_start = player.x + (player.width // 2)
+    backhand_zone_end = player.x + player.width
+
+    if now - ball.last_collision_time < collision_cooldown:
+        return score
+    MAX_SPEED = BOUNCE_MAX_SPEED
+
+    if player.x <= ball.x <= player.x + player.width and player.y <= ball.y - ball.radius <= player.y + player.height:
+        ball.y_vel *= -1
+        ball.last_collision_time = now
+        ball.last_contact = (ball.x, ball.y)
+        ball.x_vel = (ball.x - (player.x + player.width // 2)) // BOUNCE_DEFLECTION
+
+        if backhand_zone_start <= ball.x <= backhand_zone_end:
+            score += 1
+        if SOUNDS.enabled:
+            SOUNDS.play(SOUND_POINT if backhand_zone_start <= ball.x <= backhand_zone_end else SOUND_HIT)
+
+    bounced = False
+    if ball.x + ball.radius >= WIDTH:
+        ball.x = WIDTH - ball.radius
+        ball.x_vel *= -1
+        bounced = True
+    if ball.x - ball.radius <= 0:
+        ball.x = ball.radius
+        ball.x_vel *= -1
+        bounced = True
+
+    if ball.y + ball.radius >= HEIGHT:
+        ball.y = HEIGHT - ball.radius
+        ball.y_vel *= -1
+        bounced = True
+    if ball.y - ball.radius <= 0:
+        ball.y = ball.radius
+        ball.y_vel *= -1
+        bounced = True
+    if bounced and SOUNDS.enabled:
+        SOUNDS.play(SOUND_BOUNCE)
+
+    if abs(ball.x_vel) > MAX_SPEED:
+        ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
+
+    return score
+
+
+def deflect(ball, player, contact_x):
+    # Same response as the discrete handlers, using the exact contact point
+    ball.y_vel *= -1
+    ball.x_vel = (contact_x - (player.x + player.width // 2)) // BOUNCE_DEFLECTION
+    if abs(ball.x_vel) > BOUNCE_MAX_SPEED:
+        ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * BOUNCE_MAX_SPEED
+
+
+def paddle_zone(player, radius, direction):
+    # Where the ball centre touches the paddle. Balls going up meet it with their top
+    # edge, balls going down with their bottom edge, matching the discrete handlers.
+    if direction > 0:
+        return Zone(player.x, player.y - radius, player.x + player.width, player.y + player.height - radius, direction, player)
+    return Zone(player.x, player.y + radius, player.x + player.width, player.y + player.height + radius, direction, player)
+
+
+# Moves the ball through one tick and bounces it off the side walls and both paddles
+def handle_swept_collision(ball, left_player, right_player):
+    zones = [paddle_zone(left_player, ball.radius, -1), paddle_zone(right_player, ball.radius, 1)]
+    impacts = sweep(ball, zones, WIDTH, HEIGHT, ball.radius,
+                    lambda body, impact: deflect(body, impact.target, impact.x))
+    if impacts and SOUNDS.enabled:
+        for impact in impacts:
+            SOUNDS.play(SOUND_HIT if impact.kind == KIND_PADDLE else SOUND_BOUNCE)
+    return impacts
+
+
+# Swept version of the forehand/backhand drill handlers: moves the ball through one tick
+def handle_swept_drill_collision(ball, player, score, now, forehand=True, collision_cooldown=3):
+    zones = []
+    if now - ball.last_collision_time >= collision_cooldown:
+        zone = paddle_zone(player, ball.radius, -1)
+        zone.direction = 0  # The drills count a hit from either side
+        zones.append(zone)
+
+    hits = []
+
+    def on_paddle(body, impact):
+        deflect(body, player, impact.x)
+        body.last_collision_time = now
+        body.last_contact = (impact.x, impact.y)
+        hits.append(impact.x)
+
+    impacts = sweep(ball, zones, WIDTH, HEIGHT, ball.radius, on_paddle, vertical_walls=True)
+
+    half = player.x + (player.width // 2)
+    previous_score = score
+    for contact_x in hits:
+        if forehand and player.x <= contact_x <= half:
+            score += 1
+        elif not forehand and half <= contact_x <= player.x + player.width:
+            score += 1
+    if impacts and SOUNDS.enabled:
+        for impact in impacts:
+            if impact.kind != KIND_PADDLE:
+                SOUNDS.play(SOUND_BOUNCE)
+        if hits:
+            SOUNDS.play(SOUND_POINT if score > previous_score else SOUND_HIT)
+    return score
+
+
+# Define an updated player movement function for unrestricted movement
+def handle_player_movement_anywhere(keys, player):
+    # The player can move freely within the game boundaries
+    if keys[pygame.K_d] and player.x + player.width + player.VEL <= WIDTH:
+        player.move(right=True)
+    if keys[pygame.K_a] and player.x - player.VEL >= 0:
+        player.move(right=False)
+
+    if keys[pygame.K_w] and player.y - player.VEL >= 0:
+        player.y -= player.VEL
+    if keys[pygame.K_s] and player.y + player.height + player.VEL <= HEIGHT:
+        player.y += player.VEL
+
+
+# Per-tick inputs are a bitmask so they can be generated, logged and replayed cheaply
+INPUT_LEFT_PLAYER_LEFT = 1 << 0
+INPUT_LEFT_PLAYER_RIGHT = 1 << 1
+INPUT_LEFT_PLAYER_UP = 1 << 2
+INPUT_LEFT_PLAYER_DOWN = 1 << 3
+INPUT_RIGHT_PLAYER_LEFT = 1 << 4
+INPUT_RIGHT_PLAYER_RIGHT = 1 << 5
+INPUT_RIGHT_PLAYER_UP = 1 << 6
+INPUT_RIGHT_PLAYER_DOWN = 1 << 7
+INPUT_SERVE_PRESS = 1 << 8
+INPUT_SERVE_RELEASE = 1 << 9
+INPUT_SERVE_EVENTS = INPUT_SERVE_PRESS | INPUT_SERVE_RELEASE  # Edges rather than held keys
+
+KEY_INPUTS = {
+    pygame.K_a: INPUT_LEFT_PLAYER_LEFT,
+    pygame.K_d: INPUT_LEFT_PLAYER_RIGHT,
+    pygame.K_w: INPUT_LEFT_PLAYER_UP,
+    pygame.K_s: INPUT_LEFT_PLAYER_DOWN,
+    pygame.K_LEFT: INPUT_RIGHT_PLAYER_LEFT,
+    pygame.K_RIGHT: INPUT_RIGHT_PLAYER_RIGHT,
+    pygame.K_UP: INPUT_RIGHT_PLAYER_UP,
+    pygame.K_DOWN: INPUT_RIGHT_PLAYER_DOWN,
+}
+
+
+# Lets the keyboard movement handlers read an input bitmask like pygame.key.get_pressed()
+class InputKeys:
+    def __init__(self, inputs):
+        self.inputs = inputs
+
+    def __getitem__(self, key):
+        return bool(self.inputs & KEY_INPUTS.get(key, 0))
+
+
+def inputs_from_keys(keys, events=()):
+    inputs = 0
+    for key, bit in KEY_INPUTS.items():
+        if keys[key]:
+            inputs |= bit
+
+    for event in events:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            inputs |= INPUT_SERVE_PRESS
+        elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+            inputs |= INPUT_SERVE_RELEASE
+    return inputs
+
+
+MODE_VS_PLAYER = "vs_player"
+MODE_VS_AI = "vs_ai"
+
+
+class MatchState:
+    def __init__(self, mode=MODE_VS_PLAYER, seed=None, ai=None):
+        self.mode = mode
+        self.ai = ai  # Opponent with update(state) for MODE_VS_AI; None uses handle_ai_movement
+        self.left_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.right_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), HEIGHT - 10 - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.ball = Ball(WIDTH // 2, HEIGHT // 2, BALL_RADIUS)
+
+        self.left_score = 0
+        self.right_score = 0
+        self.serving = True
+        self.power_level = POWER_MIN
+        self.power_direction = 1
+        self.holding_space = False
+        self.power_building = False
+        self.left_serve = True
+
+        self.rng = random.Random(seed)  # Drives the AI's aiming noise
+        self.continuous = CONTINUOUS_COLLISIONS
+        self.tick = 0
+
+    @property
+    def players(self):
+        return [self.left_player, self.right_player]
+
+    @property
+    def scores(self):
+        return self.left_score, self.right_score
+
+    @property
+    def finished(self):
+        return self.left_score >= WINNING_SCORE or self.right_score >= WINNING_SCORE
+
+    @property
+    def winner(self):
+        if self.left_score >= WINNING_SCORE:
+            return "left"
+        if self.right_score >= WINNING_SCORE:
+            return "right"
+        return None
+
+
+def serve(state):
+    ball = state.ball
+    if state.left_serve or state.mode == MODE_VS_AI:
+        ball.y = state.left_player.y + state.left_player.height
+        ball.y_vel = ball.MAX_VEL * state.power_level
+        ball.x = state.left_player.x + state.left_player.width // 2
+    else:
+        ball.y = state.right_player.y
+        ball.y_vel = -ball.MAX_VEL * state.power_level
+        ball.x = state.right_player.x + state.right_player.width // 2
+
+    state.serving = False
+    state.power_building = False
+    state.power_level = POWER_MIN
+    if SOUNDS.enabled:
+        SOUNDS.play(SOUND_SERVE)
+
+
+def award_point(state, left_scored):
+    ball = state.ball
+    if left_scored:
+        state.left_score += 1
+    else:
+        state.right_score += 1
+    if SOUNDS.enabled:
+        SOUNDS.play(SOUND_POINT)
+
+    ball.reset()
+    state.left_player.reset()
+    state.right_player.reset()
+    state.serving = True
+
+    if state.mode == MODE_VS_PLAYER:
+        # Whoever won the point serves next
+        state.left_serve = left_scored
+        if left_scored:
+            ball.x = state.left_player.x + state.left_player.width // 2
+            ball.y = state.left_player.y + state.left_player.height
+        else:
+            ball.x = state.right_player.x + state.right_player.width // 2
+            ball.y = state.right_player.y - ball.radius
+
+
+def build_power(state):
+    # The power meter sweeps up and down for as long as space is held
+    if state.holding_space and state.power_building:
+        state.power_level += POWER_INCREMENT * state.power_direction
+        if state.power_level >= POWER_MAX:
+            state.power_direction = -1
+        elif state.power_level <= POWER_MIN:
+            state.power_direction = 1
+
+
+# Advances the match by one tick
+def step(state, inputs):
+    if state.serving:
+        if inputs & INPUT_SERVE_PRESS:
+            state.holding_space = True
+            state.power_building = True
+        # A press and release in the same tick is a quick tap, so both are applied in order
+        if inputs & INPUT_SERVE_RELEASE:
+            state.holding_space = False
+            if state.power_building:
+                serve(state)
+
+    handle_player_movement(InputKeys(inputs), state.left_player, state.right_player)
+    if PROFILER.enabled:
+        PROFILER.mark("movement")
+    if state.mode == MODE_VS_AI:
+        if state.ai is None:
+            handle_ai_movement(state.ball, state.right_player, state.rng)
+        else:
+            state.ai.update(state)
+        if PROFILER.enabled:
+            PROFILER.mark("ai")
+
+    build_power(state)
+
+    if not state.serving:
+        if state.continuous:
+            handle_swept_collision(state.ball, state.left_player, state.right_player)
+        else:
+            state.ball.move()
+            handle_collision(state.ball, state.left_player, state.right_player)
+
+    # Ball goes off the top, right player scores
+    if state.ball.y < 0:
+        award_point(state, left_scored=False)
+    # Ball goes off the bottom, left player scores
+    elif state.ball.y > HEIGHT:
+        award_point(state, left_scored=True)
+
+    if PROFILER.enabled:
+        PROFILER.mark("collision")
+    state.tick += 1
+
+
+MODE_FOREHAND = "forehand"
+MODE_BACKHAND = "backhand"
+MODE_SERVE = "serve"
+DRILL_BALL_Y_VEL = 15
+SERVE_TARGET_POWER = 0.8 * POWER_MAX  # Serves at least this strong count towards the serve drill
+
+
+class DrillState:
+    def __init__(self, mode):
+        self.mode = mode
+        if mode == MODE_SERVE:
+            self.player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), HEIGHT - 10 - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
+            self.ball = Ball(WIDTH // 2, HEIGHT - 10 - PLAYER_HEIGHT, BALL_RADIUS)
+            self.ball.y_vel = 0
+            self.ball.x_vel = 0
+        else:
+            self.player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
+            self.ball = Ball(WIDTH // 2, 10 + PLAYER_HEIGHT, BALL_RADIUS)
+            self.ball.y_vel = DRILL_BALL_Y_VEL
+
+        self.score = 0
+        self.serving = True
+        self.power_level = POWER_MIN
+        self.power_direction = 1
+        self.holding_space = False
+        self.power_building = False
+        self.continuous = CONTINUOUS_COLLISIONS
+        self.tick = 0
+
+    @property
+    def players(self):
+        return [self.player]
+
+    @property
+    def scores(self):
+        return self.score, 0
+
+    @property
+    def finished(self):
+        return self.score >= WINNING_SCORE
+
+
+def step_serve_drill(state, inputs):
+    ball = state.ball
+    player = state.player
+
+    if state.serving:
+        if inputs & INPUT_SERVE_PRESS:
+            state.holding_space = True
+            state.power_building = True
+        if inputs & INPUT_SERVE_RELEASE:
+            state.holding_space = False
+            if state.power_building:
+                if state.power_level >= SERVE_TARGET_POWER:
+                    state.score += 1
+                if SOUNDS.enabled:
+                    SOUNDS.play(SOUND_POINT if state.power_level >= SERVE_TARGET_POWER else SOUND_SERVE)
+                # Serve from the player's position with velocity based on the power level
+                ball.y = player.y - BALL_RADIUS
+                ball.y_vel = -ball.MAX_VEL * state.power_level
+                ball.x = player.x + player.width // 2
+                state.serving = False
+                state.power_building = False
+                state.power_level = POWER_MIN
+
+    build_power(state)
+
+    if not state.serving:
+        ball.move()
+
+        # The ball left the far end, so the serve is done
+        if ball.y < 0:
+            ball.reset()
+            state.serving = True
+
+
+# Advances a learning drill by one tick
+def step_drill(state, inputs):
+    if state.mode == MODE_SERVE:
+        step_serve_drill(state, inputs)
+    else:
+        handle_player_movement_anywhere(InputKeys(inputs), state.player)
+        if PROFILER.enabled:
+            PROFILER.mark("movement")
+        now = state.tick / TICK_RATE  # Game seconds, so the hit cooldown replays exactly and stops while paused
+        if state.continuous:
+            state.score = handle_swept_drill_collision(state.ball, state.player, state.score, now, state.mode == MODE_FOREHAND)
+        else:
+            if state.mode == MODE_FOREHAND:
+                state.score = handle_forehand_collision(state.ball, state.player, state.score, now)
+            else:
+                state.score = handle_backhand_collision(state.ball, state.player, state.score, now)
+            state.ball.move()
+
+    if PROFILER.enabled:
+        PROFILER.mark("collision")
+    state.tick += 1
+
+
+# Runs a match without a display or frame cap; input_source(state) returns each tick's inputs
+def simulate(state, input_source, max_ticks=None):
+    while not state.finished and (max_ticks is None or state.tick < max_ticks):
+        step(state, input_source(state))
+    return state
@@ -0,0 +1,60 @@
+import json
+import os
+
+import pygame
+
+# pygame.font.SysFont scans every installed font the first time it is called, which
+# dominates startup. Fonts are created on first use instead, and the file each name
+# resolved to is remembered on disk so later launches skip the scan.
+
+FONT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ace_academy", "fonts.json")
+
+_paths = None
+_fonts = {}
+use_disk_cache = True
+
+
+def _load_paths():
+    global _paths
+    if _paths is None:
+        _paths = {}
+        if use_disk_cache:
+            try:
+                with open(FONT_CACHE_PATH) as cache_file:
+                    _paths = json.load(cache_file)
+            except (OSError, ValueError):
+                pass
+    return _paths
+
+
+def _save_paths():
+    if not use_disk_cache:
+        return
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_PATH), exist_ok=True)
+        with open(FONT_CACHE_PATH, "w") as cache_file:
+            json.dump(_paths, cache_file)
+    except OSError:
+        pass  # A read-only home directory only costs the scan next launch
+
+
+def font_path(name):
+    paths = _load_paths()
+    if name in paths and (paths[name] is None or os.path.exists(paths[name])):
+        return paths[name]
+
+    # None means no match, in which case pygame's default font is used like SysFont does
+    paths[name] = pygame.font.match_font(name)
+    _save_paths()
+    return paths[name]
+
+
+def get_font(name, size):
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(font_path(name), size)
+        _fonts[key] = font
+    return font
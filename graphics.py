@@ -0,0 +1,114 @@
+from collections import deque
+
+import pygame
+
+from profiler import percentile
+
+# Graphics quality levels, lowest first. Below full scale the game is drawn onto a
+# smaller canvas and stretched to the window, which cuts the pixels drawn per frame.
+# The Auto setting watches how long frames take and moves between levels to keep
+# the frame rate.
+
+
+class QualityLevel:
+    def __init__(self, name, scale, smooth, antialias):
+        self.name = name
+        self.scale = scale  # Internal resolution as a fraction of the window
+        self.smooth = smooth  # Smoothscale the background instead of nearest-neighbour
+        self.antialias = antialias  # Anti-aliased text
+
+
+QUALITY_LEVELS = (
+    QualityLevel("low", scale=0.5, smooth=False, antialias=False),
+    QualityLevel("medium", scale=0.75, smooth=False, antialias=True),
+    QualityLevel("high", scale=1.0, smooth=True, antialias=True),
+)
+AUTO = "auto"
+SETTINGS = [level.name for level in QUALITY_LEVELS] + [AUTO]
+
+
+class QualityGovernor:
+    WINDOW = 60  # Frames looked at before deciding
+    DOWN_FRACTION = 0.85  # Step down when the slowest tenth of frames use this much of the budget
+    UP_FRACTION = 0.45  # Step up only when they use less than this
+    COOLDOWN = 120  # Frames to wait after a change before judging the new level
+    RETRY_DELAY = 3600  # Frames a level's measured cost is trusted for, so levels are re-tried about once a minute
+    GAIN = 0.9  # A lower level has to be at least 10% cheaper to be worth its looks
+
+    def __init__(self, target_fps=60, setting="high"):
+        self.target_fps = target_fps
+        self.samples = deque(maxlen=self.WINDOW)
+        self.index = len(QUALITY_LEVELS) - 1
+        self.cooldown = 0
+        self.frames = 0
+        self.costs = {}  # level index -> (slowest-tenth frame cost, frame it was measured)
+        self.changes = 0  # Bumped on every level change
+        self._canvas = None
+        self.set(setting)
+
+    @property
+    def level(self):
+        return QUALITY_LEVELS[self.index]
+
+    def set(self, setting):
+        self.setting = setting
+        if setting != AUTO:
+            self.select(SETTINGS.index(setting))
+        self.samples.clear()
+        self.cooldown = 0
+        self.costs.clear()
+
+    def select(self, index):
+        if index != self.index:
+            self.index = index
+            self.changes += 1
+
+    def record(self, work_time):
+        # Seconds a frame took excluding the frame cap's sleep; only Auto acts on it
+        self.frames += 1
+        if self.setting != AUTO:
+            return
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+        self.samples.append(work_time)
+        if len(self.samples) < self.WINDOW:
+            return
+
+        slow = percentile(sorted(self.samples), 0.9) * self.target_fps  # Fraction of the frame budget
+        self.costs[self.index] = (slow, self.frames)
+        index = self.index
+        if slow > self.DOWN_FRACTION and index > 0 and not self.no_faster(index - 1, slow):
+            index -= 1
+        elif index < len(QUALITY_LEVELS) - 1:
+            above = self.cost(index + 1)
+            # Don't go back up to a level that was too slow until its measurement is stale
+            if (slow < self.UP_FRACTION and (above is None or above <= self.DOWN_FRACTION)) or self.no_faster(index, above):
+                index += 1
+
+        if index != self.index:
+            self.select(index)
+            self.samples.clear()
+            self.cooldown = self.COOLDOWN
+
+    def cost(self, index):
+        # Recently measured frame cost at a level, or None
+        entry = self.costs.get(index)
+        if entry is None or self.frames - entry[1] > self.RETRY_DELAY:
+            return None
+        return entry[0]
+
+    def no_faster(self, index, cost):
+        # Stretching a smaller canvas isn't free, so a lower level can turn out no cheaper than the one above
+        measured = self.cost(index)
+        return measured is not None and cost is not None and measured > cost * self.GAIN
+
+    def canvas(self, size):
+        # The reduced-resolution surface for the current level, reused between frames
+        width, height = int(size[0] * self.level.scale), int(size[1] * self.level.scale)
+        if self._canvas is None or self._canvas.get_size() != (width, height):
+            self._canvas = pygame.Surface((width, height)).convert()
+        return self._canvas
+
+
+GRAPHICS = QualityGovernor()
@@ -0,0 +1,130 @@
+import csv
+
+import numpy as np
+import pygame
+
+from engine import WIDTH, HEIGHT
+
+# Where shots go in the forehand and backhand drills. Every contact and miss is one
+# increment into fixed grids, and the overlay panel repaints only the cells that have
+# changed since it was last drawn. Colours come from a fixed ramp rather than being
+# scaled to the busiest cell, so one new shot never means recolouring the whole map.
+
+COURT_BINS = (32, 30)  # Columns and rows over the whole court
+PADDLE_BINS = 20  # Slices across the paddle, left edge first
+CELL = 6  # Overlay pixels per court bin
+PADDLE_STRIP = 14  # Height of the paddle profile under the court grid
+RAMP_CAP = 32  # Counts from here up get the brightest colour
+EMPTY = (0, 0, 40)
+
+KIND_HIT = "hit"  # Contact that scored
+KIND_MISS = "miss"  # Contact on the wrong half of the paddle, or the ball got past
+
+
+def ramp(cap=RAMP_CAP):
+    # Brightness for each count; logarithmic so a handful of shots shows up next to many
+    return (np.log1p(np.arange(cap + 1)) / np.log1p(cap) * 255).astype(np.uint8)
+
+
+RAMP = ramp()
+
+
+class ShotHeatmap:
+    def __init__(self, mode, step_function, bins=COURT_BINS, paddle_bins=PADDLE_BINS):
+        self.mode = mode
+        self.step_function = step_function
+        self.columns, self.rows = bins
+        self.hits = np.zeros((self.rows, self.columns), np.int32)
+        self.misses = np.zeros((self.rows, self.columns), np.int32)
+        self.paddle = np.zeros(paddle_bins, np.int32)  # Contacts by where they landed on the paddle
+        self.changed = set()  # (row, column) bins counted since the overlay was last drawn
+        self.paddle_changed = False
+        self.surface = None
+
+    def add(self, kind, x, y, offset=None):
+        # offset is where on the paddle the ball landed, 0 at its left edge and 1 at its right
+        row = min(max(int(y * self.rows / HEIGHT), 0), self.rows - 1)
+        column = min(max(int(x * self.columns / WIDTH), 0), self.columns - 1)
+        (self.hits if kind == KIND_HIT else self.misses)[row, column] += 1
+        self.changed.add((row, column))
+        if offset is not None:
+            self.paddle[min(max(int(offset * len(self.paddle)), 0), len(self.paddle) - 1)] += 1
+            self.paddle_changed = True
+
+    def step(self, state, inputs):
+        # Wraps a drill's step function like ReplayRecorder does
+        ball = state.ball
+        score, last_hit, y_vel = state.score, ball.last_collision_time, ball.y_vel
+        self.step_function(state, inputs)
+
+        if ball.last_collision_time != last_hit and ball.last_contact is not None:
+            x, y = ball.last_contact
+            player = state.player
+            self.add(KIND_HIT if state.score > score else KIND_MISS, x, y, (x - player.x) / player.width)
+        elif y_vel < 0 < ball.y_vel and ball.y < state.player.y + state.player.height:
+            self.add(KIND_MISS, ball.x, ball.radius)  # Bounced off the top wall behind the paddle
+
+    @property
+    def size(self):
+        # Of the overlay panel
+        return self.columns * CELL, self.rows * CELL + PADDLE_STRIP
+
+    def cell_color(self, row, column):
+        return int(RAMP[min(self.misses[row, column], RAMP_CAP)]), int(RAMP[min(self.hits[row, column], RAMP_CAP)]), EMPTY[2]
+
+    def draw(self, win, position):
+        # Overlay callback: a small map of the court with the paddle profile underneath
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size)
+            self.surface.fill(EMPTY)
+            self.changed.update(zip(*np.nonzero(self.hits + self.misses)))
+            self.paddle_changed = True
+
+        for row, column in self.changed:
+            self.surface.fill(self.cell_color(row, column), (column * CELL, row * CELL, CELL, CELL))
+        self.changed.clear()
+
+        if self.paddle_changed:
+            width = self.surface.get_width()
+            top = self.rows * CELL
+            bins = len(self.paddle)
+            for index, count in enumerate(self.paddle):
+                left, right = index * width // bins, (index + 1) * width // bins
+                level = int(RAMP[min(count, RAMP_CAP)])
+                self.surface.fill((level, level, level), (left, top, right - left, PADDLE_STRIP))
+            self.surface.fill((255, 200, 0), (width // 2, top, 1, PADDLE_STRIP))  # Forehand half | backhand half
+            self.paddle_changed = False
+
+        return win.blit(self.surface, position)
+
+    def court_image(self, background=None, alpha=170):
+        # The whole session at court size, over background if given
+        colors = np.zeros((self.rows, self.columns, 3), np.uint8)
+        colors[..., 0] = RAMP[np.minimum(self.misses, RAMP_CAP)]
+        colors[..., 1] = RAMP[np.minimum(self.hits, RAMP_CAP)]
+        colors[..., 2] = EMPTY[2]
+        grid = pygame.transform.scale(pygame.surfarray.make_surface(colors.swapaxes(0, 1)), (WIDTH, HEIGHT))
+        if background is None:
+            return grid
+        image = background.copy()
+        grid.set_colorkey(EMPTY)  # Only tint the bins that saw shots
+        grid.set_alpha(alpha)
+        image.blit(grid, (0, 0))
+        return image
+
+    def export(self, path, background=None):
+        # path.csv has every non-empty bin and the paddle profile; path.png is the court picture
+        with open(path + ".csv", "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["kind", "row", "column", "count", "x", "y", "width", "height"])
+            cell_width, cell_height = WIDTH / self.columns, HEIGHT / self.rows
+            for kind, counts in ((KIND_HIT, self.hits), (KIND_MISS, self.misses)):
+                for row, column in zip(*np.nonzero(counts)):
+                    writer.writerow([kind, row, column, counts[row, column],
+                                     round(column * cell_width), round(row * cell_height), round(cell_width), round(cell_height)])
+            for index, count in enumerate(self.paddle):
+                writer.writerow(["paddle", "", index, count, "", "", "", ""])
+        pygame.image.save(self.court_image(background), path + ".png")
+
+    def totals(self):
+        return {"hits": int(self.hits.sum()), "misses": int(self.misses.sum()), "contacts": int(self.paddle.sum())}
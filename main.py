@@ -1,660 +1,970 @@
-import pygame
-import pygame_menu
-import sys
-import random
-import time
-
-# Initialize Pygame and constants
-pygame.init()
-
-# Game constants
-WIDTH, HEIGHT = 1063, 1001
-FPS = 60
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-PLAYER_WIDTH, PLAYER_HEIGHT = 100, 20
-BALL_RADIUS = 7
-SCORE_FONT = pygame.font.SysFont("comicsans", 50)
-POWER_FONT = pygame.font.SysFont("comicsans", 20)
-WINNING_SCORE = 10
-POWER_MIN = 0.025
-POWER_MAX = 4.5
-POWER_INCREMENT = 0.175
-AI_VEL = 2
-
-
-# Menu setup
-surface = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Ace Academy - Main Menu")
-
-# Player and Ball Classes
-class Player:
-    COLOR = BLACK
-    VEL = 6
-
-    def __init__(self, x, y, width, height):
-        self.x = self.original_x = x
-        self.y = self.original_y = y
-        self.width = width
-        self.height = height
-
-    def draw(self, win):
-        pygame.draw.rect(win, self.COLOR, (self.x, self.y, self.width, self.height))
-
-    def move(self, right=True):
-        if right:
-            self.x += self.VEL
-        else:
-            self.x -= self.VEL
-
-    def reset(self):
-        self.x = self.original_x
-        self.y = self.original_y
-
-
-class Ball:
-    MAX_VEL = 6
-    COLOR = BLACK
-
-    def __init__(self, x, y, radius, image_path="tennis_ball.png"):
-        self.x = self.original_x = x
-        self.y = self.original_y = y
-        self.radius = radius
-        self.x_vel = 0
-        self.y_vel = -self.MAX_VEL
-        self.image = pygame.image.load(image_path)
-        self.image = pygame.transform.scale(self.image, (self.radius * 2, self.radius * 2))
-        self.last_collision_time = time.time()
-
-    def draw(self, win):
-        win.blit(self.image, (self.x - self.radius, self.y - self.radius))
-
-    def move(self):
-        self.x += self.x_vel
-        self.y += self.y_vel
-
-    def reset(self):
-        self.x = self.original_x
-        self.y = self.original_y
-        self.y_vel *= -1
-        self.x_vel = 0
-
-
-# Define game functions
-def draw(win, players, ball, left_score, right_score, power_level):
-    background = pygame.image.load('tennis.png')  
-    background = pygame.transform.scale(background, (WIDTH, HEIGHT))
-    win.blit(background, (0, 0))
-
-    left_score_text = SCORE_FONT.render(f"{left_score}", 1, WHITE)
-    right_score_text = SCORE_FONT.render(f"{right_score}", 1, WHITE)
-    win.blit(left_score_text, (40, 20))
-    win.blit(right_score_text, (40, HEIGHT - 80))
-
-    for player in players:
-        player.draw(win)
-
-    pygame.draw.rect(win, WHITE, (WIDTH - 100, HEIGHT - 50, 80, 20))
-    pygame.draw.rect(win, BLACK, (WIDTH - 100, HEIGHT - 50, 80 * (power_level / POWER_MAX), 20))
-
-    ball.draw(win)
-
-    pygame.display.update()
-
-
-def handle_collision(ball, left_player, right_player):
-    MAX_SPEED = 8
-
-    if ball.x + ball.radius >= WIDTH:
-        ball.x = WIDTH - ball.radius
-        ball.x_vel *= -1
-    elif ball.x - ball.radius <= 0:
-        ball.x = ball.radius
-        ball.x_vel *= -1
-
-    if ball.y_vel < 0:
-        if (
-            left_player.x <= ball.x <= left_player.x + left_player.width
-            and left_player.y <= ball.y - ball.radius <= left_player.y + left_player.height
-        ):
-            ball.y_vel *= -1
-            ball.x_vel = (ball.x - (left_player.x + left_player.width // 2)) // 20
-            if abs(ball.x_vel) > MAX_SPEED:
-                ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
-
-    elif ball.y_vel > 0:
-        if (
-            right_player.x <= ball.x <= right_player.x + right_player.width
-            and right_player.y <= ball.y + ball.radius <= right_player.y + right_player.height
-        ):
-            ball.y_vel *= -1
-            ball.x_vel = (ball.x - (right_player.x + right_player.width // 2)) // 20
-            if abs(ball.x_vel) > MAX_SPEED:
-                ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
-
-
-def handle_player_movement(keys, left_player, right_player):
-    if keys[pygame.K_d] and left_player.x + left_player.width + left_player.VEL <= WIDTH:
-        left_player.move(right=True)
-    if keys[pygame.K_a] and left_player.x - left_player.VEL >= 0:
-        left_player.move(right=False)
-
-    if keys[pygame.K_w] and left_player.y - left_player.VEL >= 0:
-        left_player.y -= left_player.VEL
-    if keys[pygame.K_s] and left_player.y + left_player.height + left_player.VEL <= HEIGHT // 2:
-        left_player.y += left_player.VEL
-
-    if keys[pygame.K_RIGHT] and right_player.x + right_player.width + right_player.VEL <= WIDTH:
-        right_player.move(right=True)
-    if keys[pygame.K_LEFT] and right_player.x - right_player.VEL >= 0:
-        right_player.move(right=False)
-
-    if keys[pygame.K_DOWN] and right_player.y + right_player.height + right_player.VEL <= HEIGHT:
-        right_player.y += right_player.VEL
-    if keys[pygame.K_UP] and right_player.y - right_player.VEL >= HEIGHT // 2:
-        right_player.y -= right_player.VEL
-
-
-def handle_ai_movement(ball, right_player):
-    ai_target_point = ball.x + random.randint(-25, 25)
-
-    min_x = 0
-    max_x = WIDTH - right_player.width
-
-    if right_player.x + (right_player.width // 2) < ai_target_point and right_player.x + right_player.width + AI_VEL <= max_x:
-        right_player.x += AI_VEL
-
-    if right_player.x + (right_player.width // 2) > ai_target_point and right_player.x - AI_VEL >= min_x:
-        right_player.x -= AI_VEL
-
-def handle_forehand_collision(ball, player, score, collision_cooldown=3):
-    forehand_zone_start = player.x
-    forehand_zone_end = player.x + (player.width // 2)
-
-    if time.time() - ball.last_collision_time < collision_cooldown:
-        return score
-    MAX_SPEED = 8
-
-    if player.x <= ball.x <= player.x + player.width and player.y <= ball.y - ball.radius <= player.y + player.height:
-        ball.y_vel *= -1
-        ball.last_collision_time = time.time()
-        ball.x_vel = (ball.x - (player.x + player.width // 2)) // 20
-
-        if forehand_zone_start <= ball.x <= forehand_zone_end:
-            score += 1
-
-    if ball.x + ball.radius >= WIDTH:
-        ball.x = WIDTH - ball.radius
-        ball.x_vel *= -1
-    if ball.x - ball.radius <= 0:
-        ball.x = ball.radius
-        ball.x_vel *= -1
-
-    if ball.y + ball.radius >= HEIGHT:
-        ball.y = HEIGHT - ball.radius
-        ball.y_vel *= -1
-    if ball.y - ball.radius <= 0:
-        ball.y = ball.radius
-        ball.y_vel *= -1
-
-    if abs(ball.x_vel) > MAX_SPEED:
-        ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
-
-    return score
-
-def handle_backhand_collision(ball, player, score, collision_cooldown = 3):
-    backhand_zone_start = player.x + (player.width // 2)
-    backhand_zone_end = player.x + player.width
-
-    if time.time() - ball.last_collision_time < collision_cooldown:
-        return score
-    MAX_SPEED = 8
-
-    if player.x <= ball.x <= player.x + player.width and player.y <= ball.y - ball.radius <= player.y + player.height:
-        ball.y_vel *= -1
-        ball.last_collision_time = time.time()
-        ball.x_vel = (ball.x - (player.x + player.width // 2)) // 20
-
-        if backhand_zone_start <= ball.x <= backhand_zone_end:
-            score += 1
-
-    if ball.x + ball.radius >= WIDTH:
-        ball.x = WIDTH - ball.radius
-        ball.x_vel *= -1
-    if ball.x - ball.radius <= 0:
-        ball.x = ball.radius
-        ball.x_vel *= -1
-
-    if ball.y + ball.radius >= HEIGHT:
-        ball.y = HEIGHT - ball.radius
-        ball.y_vel *= -1
-    if ball.y - ball.radius <= 0:
-        ball.y = ball.radius
-        ball.y_vel *= -1
-
-    if abs(ball.x_vel) > MAX_SPEED:
-        ball.x_vel = (ball.x_vel / abs(ball.x_vel)) * MAX_SPEED
-
-    return score
-
-
-# Define an updated player movement function for unrestricted movement
-def handle_player_movement_anywhere(keys, player):
-    # The player can move freely within the game boundaries
-    if keys[pygame.K_d] and player.x + player.width + player.VEL <= WIDTH:
-        player.move(right=True)
-    if keys[pygame.K_a] and player.x - player.VEL >= 0:
-        player.move(right=False)
-
-    if keys[pygame.K_w] and player.y - player.VEL >= 0:
-        player.y -= player.VEL
-    if keys[pygame.K_s] and player.y + player.height + player.VEL <= HEIGHT:
-        player.y += player.VEL
-
-
-# Game mode functions
-def start_vs_player_game():
-    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ace Academy - VS Player Mode")
-
-    left_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
-    right_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), HEIGHT - 10 - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
-    ball = Ball(WIDTH // 2, HEIGHT // 2, BALL_RADIUS, "tennis_ball.png")
-
-    left_score = 0
-    right_score = 0
-    players = [left_player, right_player]
-
-    serving = True
-    power_level = POWER_MIN
-    power_direction = 1
-    clock = pygame.time.Clock()
-
-    holding_space = False
-    power_building = False
-    left_serve = True
-
-    while True:
-        clock.tick(FPS)
-        draw(WIN, players, ball, left_score, right_score, power_level)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and serving:
-                holding_space = True
-                power_building = True
-
-
-            elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE and serving:
-                holding_space = False
-                if power_building:
-                    if left_serve:
-                        ball.y = left_player.y + left_player.height
-                        ball.y_vel = ball.MAX_VEL * power_level
-                        ball.x = left_player.x + left_player.width // 2
-                    else:
-                        ball.y = right_player.y
-                        ball.y_vel = -ball.MAX_VEL * power_level
-                        ball.x = right_player.x + right_player.width // 2
-                        
-                    serving = False
-                    power_building = False
-                    power_level = POWER_MIN
-        
-        keys = pygame.key.get_pressed()
-        handle_player_movement(keys, left_player, right_player)
-
-
-        if holding_space and power_building:
-            power_level += POWER_INCREMENT * power_direction
-            if power_level >= POWER_MAX:
-                power_direction = -1
-            elif power_level <= POWER_MIN:
-                power_direction = 1
-
-        if not serving:
-            ball.move()
-            handle_collision(ball, left_player, right_player)
-
-        if ball.y < 0:
-            right_score += 1
-            ball.reset()
-            left_player.reset()
-            right_player.reset()
-            ball.x = right_player.x + right_player.width // 2
-            ball.y = right_player.y  - ball.radius
-            left_serve = False
-            serving = True
-
-        elif ball.y > HEIGHT:
-            left_score += 1
-            ball.reset()
-            left_player.reset()
-            right_player.reset()
-            ball.x = left_player.x + left_player.width // 2
-            ball.y = left_player.y + left_player.height
-            left_serve = True
-            serving = True
-
-        if left_score >= WINNING_SCORE:
-            break
-        elif right_score >= WINNING_SCORE:
-            break
-
-    # Reset the scores and player positions for the next game
-    left_score = 0
-    right_score = 0
-    left_player.reset()
-    right_player.reset()
-    ball.reset()
-
-def start_vs_ai_gamemode():
-    # Set up the game for AI versus player mode
-    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ace Academy - VS AI Mode")
-
-    # Create players and ball
-    left_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
-    right_player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), HEIGHT - 10 - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
-    ball = Ball(WIDTH // 2, HEIGHT // 2, BALL_RADIUS, "tennis_ball.png")
-
-    # Initialize game variables
-    left_score = 0
-    right_score = 0
-    players = [left_player, right_player]
-    serving = True
-    power_level = POWER_MIN
-    power_direction = 1
-    clock = pygame.time.Clock()
-
-    holding_space = False
-    power_building = False
-    left_serve = True  # Left player serves
-
-    # Main game loop
-    while True:
-        clock.tick(FPS)
-        draw(WIN, players, ball, left_score, right_score, power_level)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            # Start power building when space bar is held down
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and serving:
-                holding_space = True
-                power_building = True
-
-            # Serve when space bar is released
-            elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE and serving:
-                holding_space = False
-                if power_building:
-                    ball.y = left_player.y + left_player.height
-                    ball.y_vel = ball.MAX_VEL * power_level
-                    ball.x = left_player.x + left_player.width // 2
-
-                    serving = False  # Serving done
-                    power_building = False
-                    power_level = POWER_MIN
-        
-        # Player and AI movements
-        keys = pygame.key.get_pressed()
-        handle_player_movement(keys, left_player, right_player)
-        handle_ai_movement(ball, right_player)
-
-        # Power level increment when holding space bar
-        if holding_space and power_building:
-            power_level += POWER_INCREMENT * power_direction
-            if power_level >= POWER_MAX:
-                power_direction = -1
-            elif power_level <= POWER_MIN:
-                power_direction = 1
-
-        # Ball movement and collision handling
-        if not serving:
-            ball.move()
-            handle_collision(ball, left_player, right_player)
-
-        # Ball goes off the top, right player scores
-        if ball.y < 0:
-            right_score += 1
-            ball.reset()  # Reset the ball
-            serving = True  # Restart serving
-            left_player.reset()  # Reset players
-            right_player.reset()
-        
-        # Ball goes off the bottom, left player scores
-        elif ball.y > HEIGHT:
-            left_score += 1
-            ball.reset()
-            serving = True
-            left_player.reset()
-            right_player.reset()
-
-        # Check for winning condition
-        if left_score >= WINNING_SCORE or right_score >= WINNING_SCORE:
-            break
-
-    # Reset the scores and player positions for the next game
-    left_score = 0
-    right_score = 0
-    left_player.reset()
-    right_player.reset()
-    ball.reset()
-
-
-def start_forehand_learning():
-    # Set up the game display
-    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ace Academy - Forehand Learning Mode")
-
-    # Set up player, ball, and game variables
-    clock = pygame.time.Clock()
-    player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
-    
-    # Set the initial ball position and velocity
-    initial_ball_y_vel = 15
-    ball = Ball(WIDTH // 2, 10 + PLAYER_HEIGHT, BALL_RADIUS, 'tennis_ball.png')
-    ball.y_vel = initial_ball_y_vel  # Set the initial velocity for the ball
-
-    score = 0
-    running = True
-
-    while running:
-        clock.tick(FPS)
-        draw(WIN, [player], ball, score, 0, POWER_MIN)  # Draw the game screen
-
-        # Handle player movement and collisions
-        keys = pygame.key.get_pressed()
-        handle_player_movement_anywhere(keys, player)
-        score = handle_forehand_collision(ball, player, score)  # Handle forehand collision
-
-        # Move the ball
-        ball.move()
-
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False  # Exit loop if quit event is detected
-                break
-
-        # Check if learning objective is completed
-        if score >= WINNING_SCORE:
-            text = SCORE_FONT.render("You managed to hit 10 forehand shots", 1, WHITE)
-            WIN.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
-            pygame.display.update()
-            pygame.time.delay(2000)  # Pause for 2 seconds
-            score = 0  # Reset score
-
-    pygame.quit()  # Exit Pygame when done
-  
-
-def start_backhand_learning():
-    # Set up the game display
-    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ace Academy - Backhand Learning Mode")
-
-    # Set up player, ball, and game variables
-    clock = pygame.time.Clock()
-    player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), 10, PLAYER_WIDTH, PLAYER_HEIGHT)
-    
-    # Set the initial ball position and velocity
-    initial_ball_y_vel = 15  # Change this value to set a different initial velocity
-    ball = Ball(WIDTH // 2, 10 + PLAYER_HEIGHT, BALL_RADIUS, 'tennis_ball.png')
-    ball.y_vel = initial_ball_y_vel  # Set the initial velocity for the ball
-
-    score = 0
-    running = True
-
-    while running:
-        clock.tick(FPS)
-        draw(WIN, [player], ball, score, 0, POWER_MIN)  # Draw the game screen
-
-        # Handle player movement and collisions
-        keys = pygame.key.get_pressed()
-        handle_player_movement_anywhere(keys, player)
-        score = handle_backhand_collision(ball, player, score)  # Handle backhand collision
-
-        # Move the ball
-        ball.move()
-
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False  # Exit loop if quit event is detected
-                break
-
-        # Check if learning objective is completed
-        if score >= WINNING_SCORE:
-            text = SCORE_FONT.render("You managed to hit 10 backhand shots", 1, WHITE)
-            WIN.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
-            pygame.display.update()
-            pygame.time.delay(2000)  # Pause for 2 seconds
-            score = 0  # Reset score
-            break
-
-
-def start_serve_learning():
-    # Initialize game screen
-    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Ace Academy - Serve Learning Mode")
-
-    # Set up clock and player position
-    clock = pygame.time.Clock()
-    player = Player(WIDTH // 2 - (PLAYER_WIDTH // 2), HEIGHT - 10 - PLAYER_HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT)
-    
-    # Initialize ball position and other variables
-    ball = Ball(WIDTH // 2, HEIGHT - 10 - PLAYER_HEIGHT, BALL_RADIUS, 'tennis_ball.png')
-    ball.y_vel = 0
-    ball.x_vel = 0
-
-    power_level = POWER_MIN
-    serving = True
-    holding_space = False
-    power_building = False
-    power_direction = 1
-    score = 0  # Initialize score
-
-    while True:
-        clock.tick(FPS)
-        draw(WIN, [player], ball, score, 0, power_level)  # Draw with current score and power level
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            # Power building when holding space
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and serving:
-                holding_space = True
-                power_building = True
-
-            # Serve when space bar is released
-            elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE and serving:
-                holding_space = False
-                if power_building:
-                    # Check if power level is above 80% of the max power
-                    if power_level >= 0.8 * POWER_MAX:
-                        score += 1  # Increment score for a high-power serve
-                    # Serve the ball
-                    ball.y = player.y - BALL_RADIUS  # Serve from player's position
-                    ball.y_vel = -ball.MAX_VEL * power_level  # Velocity based on power level
-                    ball.x = player.x + player.width // 2
-                    serving = False  # Serving completed
-                    power_building = False
-                    power_level = POWER_MIN  # Reset power level
-
-        # Handle power level increment during serving
-        if holding_space and power_building:
-            power_level += POWER_INCREMENT * power_direction
-            if power_level >= POWER_MAX:
-                power_direction = -1
-            elif power_level <= POWER_MIN:
-                power_direction = 1
-
-        # Move the ball if not serving
-        if not serving:
-            ball.move()
-
-            # Reset after ball leaves the screen (simulate successful serve)
-            if ball.y < 0:
-                ball.reset()  # Reset ball position and velocity
-                serving = True  # Reset to allow for another serve
-
-        # Check if the winning score is achieved
-        if score >= WINNING_SCORE:
-            # Display success message when winning score is achieved
-            text = SCORE_FONT.render("Congratulations! You served 10 times!", 1, WHITE)
-            WIN.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
-            pygame.display.update()
-            time.sleep(2)  # Pause for a couple of seconds
-            pygame.quit()  # Quit after achieving the goal
-            break
-
-        pygame.display.update()  # Update the game screen
-
-
-
-
-# Main menu setup
-mainmenu = pygame_menu.Menu("Ace Academy", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
-mainmenu.add.text_input("Name: ", default="", maxchar=20)
-mainmenu.add.button("Select Gamemode", lambda: mainmenu._open(gamemode))
-mainmenu.add.button("Options", lambda: mainmenu._open(options))
-mainmenu.add.button("Quit", pygame_menu.events.EXIT)
-
-# Gamemode menu setup
-gamemode = pygame_menu.Menu("Select Gamemode", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
-gamemode.add.button("Learn", lambda: mainmenu._open(learn))
-gamemode.add.button("VS AI", start_vs_ai_gamemode)
-gamemode.add.button("VS Player", start_vs_player_game)  # Start "VS Player" mode
-
-# Options menu setup
-options = pygame_menu.Menu("Options", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
-options.add.selector("Volume:", [("Low", 1), ("Medium", 2), ("High", 3)])
-options.add.selector("Graphics:", [("Low", 1), ("Medium", 2), ("High", 3)])
-
-# Additional menus
-learn = pygame_menu.Menu("Learn Menu", 1063, 1001, theme=pygame_menu.themes.THEME_GREEN)
-learn.add.button("Forhand", start_forehand_learning)
-learn.add.button("Backhand", start_backhand_learning)
-learn.add.button("Serve", start_serve_learning)
-
-
-# Main menu loop
-def run_main_menu():
-    while True:
-        events = pygame.event.get()
-        if mainmenu.is_enabled():
-            mainmenu.update(events)
-            mainmenu.draw(surface)
-
-        pygame.display.update()
-
-# Start the main menu loop
-if __name__ == "__main__":
-    run_main_menu()  # Run the main menu system
+import time
+
+STARTUP_STARTED = time.perf_counter()
+
+import argparse
+import os
+import random
+import sys
+from itertools import repeat
+
+import pygame
+
+import fonts
+from ai import CLASSIC, OPPONENTS, make_ai
+from assets import ASSETS
+from engine import (
+    WIDTH, HEIGHT, WHITE, BLACK, BALL_RADIUS, POWER_MAX, BALL_IMAGE, KEY_INPUTS, INPUT_SERVE_PRESS, INPUT_SERVE_RELEASE,
+    MODE_VS_AI, MODE_VS_PLAYER, MODE_FOREHAND, MODE_BACKHAND, MODE_SERVE,
+    MatchState, DrillState, InputKeys, step, step_drill, inputs_from_keys,
+    handle_player_movement, handle_player_movement_anywhere,
+)
+from graphics import AUTO, GRAPHICS, SETTINGS as GRAPHICS_SETTINGS
+from profiler import LATENCY, PROFILER, CpuMeter
+from render import DirtyRenderer, ScaledRenderer
+from replay import ReplayPlayer, ReplayRecorder
+from scenes import Scene, SceneManager
+from scheduler import Scheduler
+from sound import MIXER_BUFFER, SOUNDS, VOLUMES
+from stats import DEFAULT_PLAYER, MODES, STATS, STATS_PATH, SessionTracker
+from textcache import TEXT_CACHE
+from timestep import TICK_RATE, FixedTimestep, Interpolator
+
+# Game constants
+FPS = 60
+FONT_NAME = "comicsans"
+SCORE_FONT_SIZE = 50
+BACKGROUND_IMAGE = "tennis.png"
+MESSAGE_SECONDS = 2  # How long a mode's closing message stays up
+MENU_IDLE_TIMEOUT = 0.5  # Longest an untouched menu goes without a frame; also the text cursor's blink
+MENU_REFRESH = pygame.event.custom_type()  # Posted from other threads to get a menu redrawn
+DIRTY_RECTS = True  # Push only the changed regions of the screen each frame
+RECORD_DIR = None  # Set by --record to save a replay of every mode played
+HEATMAP_DIR = None  # Set by --heatmap-dir to export each drill's shot heatmap
+PROFILE_OUT = None  # Set by --profile-out to export frame timings when a mode ends
+AI_OPPONENT = CLASSIC  # Chosen in the Select Gamemode menu
+PLAYER_NAME = DEFAULT_PLAYER  # Typed into the main menu; sessions are saved under it
+NET_CONDITIONS = {}  # Simulated latency, jitter and loss for network play, set from the command line
+LATE_INPUT = False  # Set by --late-input to read the keys again just before each frame is drawn
+LATENCY_OUT = None  # Set by --latency-out to export per-frame input latency when a mode ends
+SOUND = True  # Cleared by --no-sound
+CAPTURE = None  # The FrameCapture, once --capture or --capture-command starts one
+BALL_RATE = None  # Balls per second the ball machine starts at, set by --ball-rate
+
+
+# Startup timing, printed with --startup-profile
+STARTUP_PHASES = []
+_last_startup_mark = STARTUP_STARTED
+
+
+def mark_startup(phase):
+    global _last_startup_mark
+    now = time.perf_counter()
+    STARTUP_PHASES.append((phase, now - _last_startup_mark))
+    _last_startup_mark = now
+
+
+def print_startup_profile():
+    for phase, seconds in STARTUP_PHASES:
+        print(f"{phase:<14}{seconds * 1000:8.1f} ms")
+    print(f"{'total':<14}{sum(seconds for _, seconds in STARTUP_PHASES) * 1000:8.1f} ms")
+
+
+def score_font(scale=1):
+    # Loaded on first use rather than at import, see fonts.py
+    return fonts.get_font(FONT_NAME, int(SCORE_FONT_SIZE * scale))
+
+
+# Define game functions
+def background_image(scale=1, smooth=False):
+    return ASSETS.image(BACKGROUND_IMAGE, (WIDTH * scale, HEIGHT * scale), alpha=False, smooth=smooth)
+
+
+def load_game_assets():
+    # Convert the shared images for the current display mode and quality before the first frame
+    level = GRAPHICS.level
+    size = BALL_RADIUS * 2 * level.scale
+    ASSETS.preload([
+        (BACKGROUND_IMAGE, (WIDTH * level.scale, HEIGHT * level.scale), False, level.smooth),
+        (BALL_IMAGE, (size, size), True),
+    ])
+
+
+def create_renderer(win):
+    # Made for the current quality level; scenes make a new one when the level changes
+    if not DIRTY_RECTS:
+        return None
+    level = GRAPHICS.level
+    background = background_image(level.scale, level.smooth)
+    if level.scale == 1:
+        return DirtyRenderer(win, background)
+    return ScaledRenderer(win, GRAPHICS.canvas(win.get_size()), background)
+
+
+def quality_changed(win):
+    # Auto quality or the options menu picked another level; returns the new renderer and level.
+    # Text and images made for the old level's scale and antialiasing won't be asked for again.
+    TEXT_CACHE.clear()
+    ASSETS.clear(decoded=False)
+    load_game_assets()
+    return create_renderer(win), GRAPHICS.level
+
+
+def begin_frame(win, renderer=None):
+    # Below full scale everything is drawn on a smaller canvas that is stretched to the window at the end
+    level = GRAPHICS.level
+    if renderer is None:
+        canvas = win if level.scale == 1 else GRAPHICS.canvas(win.get_size())
+        canvas.blit(background_image(level.scale, level.smooth), (0, 0))
+        return canvas
+    renderer.restore()
+    return renderer.win
+
+
+def end_frame(win, canvas, drawn, renderer=None, overlays=()):
+    # Overlays draw themselves onto the window at full resolution and return the rect they covered
+    if renderer is None:
+        if canvas is not win:
+            pygame.transform.scale(canvas, win.get_size(), win)
+        for overlay in overlays:
+            overlay(win)
+        pygame.display.update()
+    else:
+        renderer.present(drawn, overlays)
+
+
+def draw(win, players, ball, left_score, right_score, power_level, renderer=None, overlays=()):
+    level = GRAPHICS.level
+    scale = level.scale
+    canvas = begin_frame(win, renderer)
+
+    score_digits = TEXT_CACHE.digits(score_font(scale), WHITE, level.antialias)
+    drawn = [
+        score_digits.draw(canvas, left_score, (40 * scale, 20 * scale)),
+        score_digits.draw(canvas, right_score, (40 * scale, (HEIGHT - 80) * scale)),
+    ]
+
+    for player in players:
+        drawn.append(player.draw(canvas, scale))
+
+    drawn.append(pygame.draw.rect(canvas, WHITE, ((WIDTH - 100) * scale, (HEIGHT - 50) * scale, 80 * scale, 20 * scale)))
+    pygame.draw.rect(canvas, BLACK, ((WIDTH - 100) * scale, (HEIGHT - 50) * scale, 80 * (power_level / POWER_MAX) * scale, 20 * scale))
+
+    drawn.append(ball.draw(canvas, scale))
+    end_frame(win, canvas, drawn, renderer, overlays)
+
+
+def draw_state(win, state, renderer=None, overlays=()):
+    left_score, right_score = state.scores
+    draw(win, state.players, state.ball, left_score, right_score, state.power_level, renderer, overlays)
+
+
+def draw_ball_machine(win, state, alpha, renderer=None, overlays=()):
+    # The balls share one sprite and go out in a single blits() call. They are tracked as
+    # one dirty rect around them all, since merging a rect per ball costs more than drawing.
+    level = GRAPHICS.level
+    scale = level.scale
+    canvas = begin_frame(win, renderer)
+
+    hits, misses = state.scores
+    score_digits = TEXT_CACHE.digits(score_font(scale), WHITE, level.antialias)
+    drawn = [
+        score_digits.draw(canvas, hits, (40 * scale, 20 * scale)),
+        score_digits.draw(canvas, misses, (40 * scale, (HEIGHT - 80) * scale)),
+        state.player.draw(canvas, scale),
+    ]
+
+    if state.count:
+        from ballmachine import sprite_positions
+
+        size = state.radius * 2 * scale
+        sprite = ASSETS.image(BALL_IMAGE, (size, size))
+        left, top = sprite_positions(state, alpha, scale)
+        canvas.blits(zip(repeat(sprite), zip(left.tolist(), top.tolist())), doreturn=False)
+        x, y = int(left.min()), int(top.min())
+        drawn.append(pygame.Rect(x, y, int(left.max()) - x + sprite.get_width(), int(top.max()) - y + sprite.get_height()))
+
+    end_frame(win, canvas, drawn, renderer, overlays)
+
+
+# Frame timing overlay, toggled with F3
+class PerformanceHud:
+    REFRESH_FRAMES = 15  # Re-render the numbers a few times a second rather than every frame
+    FONT_SIZE = 20
+
+    def __init__(self):
+        self.visible = False
+        self.network = None  # NetStats of the network game in progress
+        self.ball_machine = None  # BallMachineState of the ball machine drill in progress
+        self.surface = None
+        self.age = 0
+
+    def toggle(self):
+        # F3 in any scene; the profiler only runs while something reads its numbers
+        self.visible = not self.visible
+        PROFILER.enable(self.visible or PROFILE_OUT is not None)
+
+    def lines(self, renderer):
+        summary = PROFILER.summary()
+        lines = [
+            f"{summary['fps']:5.1f} fps  p50 {summary['p50_ms']:.1f}  p95 {summary['p95_ms']:.1f}  p99 {summary['p99_ms']:.1f} ms",
+            f"dropped {summary['dropped_frames']} of {summary['total_frames']} frames",
+        ]
+        for phase, ms in sorted(summary["phase_ms"].items()):
+            lines.append(f"{phase:<10}{ms:7.3f} ms")
+        text = TEXT_CACHE.stats()
+        lines.append(f"text cache {text['hits']} hits  {text['misses']} misses")
+        assets = ASSETS.stats()
+        lines.append(f"assets {assets['hits']} hits  {assets['misses']} misses")
+        if renderer is not None:
+            lines.append(f"pixels pushed {renderer.pixels_pushed}")
+        lines.append(f"scene switch {SCENES.switch_time * 1000:.2f} ms")
+        lines.append(f"graphics {GRAPHICS.level.name}{' (auto)' if GRAPHICS.setting == AUTO else ''}")
+        if SOUNDS.enabled:
+            sounds = SOUNDS.stats()
+            lines.append(f"sounds {sounds['plays']} played  {sounds['stolen']} stolen")
+        if CAPTURE is not None:
+            capture = CAPTURE.stats()
+            lines.append(f"capture {capture['written']} written  {capture['queued']} queued  {capture['dropped']} dropped")
+        if LATENCY.enabled:
+            latency = LATENCY.summary()
+            lines.append(f"input latency p50 {latency['p50_ms']:.1f}  p95 {latency['p95_ms']:.1f}  max {latency['max_ms']:.1f} ms")
+        if self.ball_machine is not None:
+            machine = self.ball_machine
+            lines.append(f"balls {machine.count} live  {machine.rate}/s  {machine.fired} fired  {machine.dropped} dropped")
+        if self.network is not None:
+            network = self.network.summary()
+            lines.append(f"rtt {network['rtt_ms']:.1f} ms  missed {network['missed']}")
+            lines.append(f"net {network['sent_bytes_per_sec']:.0f} B/s up  {network['received_bytes_per_sec']:.0f} B/s down")
+        return lines
+
+    def render(self, renderer):
+        font = fonts.get_font(FONT_NAME, self.FONT_SIZE)
+        rendered = [font.render(line, GRAPHICS.level.antialias, WHITE) for line in self.lines(renderer)]
+        surface = pygame.Surface((max(text.get_width() for text in rendered) + 16, sum(text.get_height() for text in rendered) + 16), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        y = 8
+        for text in rendered:
+            surface.blit(text, (8, y))
+            y += text.get_height()
+        return surface
+
+    def draw(self, win, renderer=None):
+        if self.surface is None or self.age >= self.REFRESH_FRAMES:
+            self.surface = self.render(renderer)
+            self.age = 0
+        self.age += 1
+        return win.blit(self.surface, (WIDTH - self.surface.get_width() - 10, 10))
+
+
+HUD = PerformanceHud()
+
+
+def draw_message(win, message):
+    # Overlay callback: message in the middle of the court
+    text = TEXT_CACHE.render(score_font(), message, WHITE, GRAPHICS.level.antialias)
+    return win.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - text.get_height() // 2))
+
+
+# Game mode functions
+def save_recording(recorder):
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    path = os.path.join(RECORD_DIR, f"{recorder.mode}-{time.strftime('%Y%m%d-%H%M%S')}.acereplay")
+    recorder.save(path)
+    return path
+
+
+def save_heatmap(heatmap):
+    os.makedirs(HEATMAP_DIR, exist_ok=True)
+    path = os.path.join(HEATMAP_DIR, f"{heatmap.mode}-{time.strftime('%Y%m%d-%H%M%S')}")
+    heatmap.export(path, background_image())
+    return path
+
+
+def finish_mode(recorder, tracker=None):
+    if recorder is not None:
+        save_recording(recorder)
+    if tracker is not None and tracker.ticks:
+        STATS.record_session(tracker.player, tracker.session(), tracker.serve_powers)
+    if PROFILE_OUT is not None:
+        PROFILER.export(PROFILE_OUT)
+    if LATENCY.enabled:
+        latency = LATENCY.summary()
+        print(f"input to present: {latency['inputs']} inputs over {latency['frames']} frames, mean {latency['mean_ms']:.1f}  "
+              f"p50 {latency['p50_ms']:.1f}  p95 {latency['p95_ms']:.1f}  max {latency['max_ms']:.1f} ms")
+        if LATENCY_OUT is not None:
+            LATENCY.export_csv(LATENCY_OUT)
+
+
+def move_players(state, inputs):
+    # The keyboard movement part of step() and step_drill(); returns the paddles the keyboard drives
+    if state.mode in (MODE_VS_PLAYER, MODE_VS_AI):
+        handle_player_movement(InputKeys(inputs), state.left_player, state.right_player)
+        return [state.left_player] if state.mode == MODE_VS_AI else [state.left_player, state.right_player]
+    if state.mode != MODE_SERVE:
+        handle_player_movement_anywhere(InputKeys(inputs), state.player)
+        return [state.player]
+    return []
+
+
+# A match or drill; pops itself when it is over, and Escape pauses it under a menu
+class ModeScene(Scene):
+    event_types = ()  # Keys only
+    late_input = True
+
+    def __init__(self, state, step_function, caption, message=None, repeat=False, record=True):
+        self.state = state
+        self.step_function = step_function
+        self.caption = caption
+        self.message = message
+        self.repeat = repeat
+        self.record = record
+
+    def enter(self, manager):
+        super().enter(manager)
+        pygame.display.set_caption(self.caption)
+        load_game_assets()
+        self.renderer = create_renderer(manager.window)
+        self.level = GRAPHICS.level
+        self.recorder = None
+        self.step = self.step_function
+        if RECORD_DIR is not None and self.record:
+            self.recorder = ReplayRecorder(self.state, random.getrandbits(32))
+            self.step = self.recorder.step
+        self.tracker = None
+        if STATS.enabled and self.record:
+            opponent = AI_OPPONENT if self.state.mode == MODE_VS_AI else None
+            self.tracker = SessionTracker(PLAYER_NAME, self.state, self.step, opponent)
+            self.step = self.tracker.step
+        self.timestep = FixedTimestep(TICK_RATE)
+        self.scheduler = Scheduler()  # Runs on game time, so it stops while the mode is paused
+        self.ending = None  # Task showing the closing message
+        self.interpolator = Interpolator(self.interpolated())
+        self.serve_events = []  # Space presses and releases not yet given to a tick, oldest first
+
+    def interpolated(self):
+        # Objects drawn part way between ticks
+        return self.state.players + [self.state.ball]
+
+    def exit(self):
+        finish_mode(self.recorder, self.tracker)
+        self.scheduler.cancel_all()
+        self.recorder = self.tracker = self.renderer = self.interpolator = self.scheduler = self.ending = None
+
+    def resume(self):
+        pygame.display.set_caption(self.caption)
+        self.timestep.reset()  # Time spent paused isn't game time
+        if self.renderer is not None:
+            self.renderer.invalidate()  # The menu drew over the whole screen
+
+    def update(self, events, frame_time):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                HUD.toggle()
+                if self.renderer is not None:
+                    self.renderer.invalidate()  # Wipe the overlay when it is hidden
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.manager.push(MenuScene(build_pause_menu(self)))
+            elif event.type == pygame.WINDOWEXPOSED and self.renderer is not None:
+                self.renderer.invalidate()
+            elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                if event.key == pygame.K_SPACE:
+                    self.serve_events.append(event)
+                elif event.key in KEY_INPUTS and not getattr(event, "latched", False):
+                    LATENCY.input(event.arrived)
+
+        # Held keys apply to every tick this frame
+        held = inputs_from_keys(pygame.key.get_pressed())
+        PROFILER.mark("events")
+
+        # Tick i of n this frame stands for the moment (n - 1 - i + alpha) ticks before the
+        # frame began; each serve press or release goes to the first tick at or after it, or
+        # to the last tick rather than wait for the next frame
+        state = self.state
+        ticks = self.timestep.advance(frame_time)
+        tick_time = self.timestep.tick_time
+        if self.ending is None:
+            first_tick = self.manager.frame_start - (ticks - 1 + self.timestep.alpha) * tick_time
+            for index in range(ticks):
+                until = first_tick + index * tick_time if index < ticks - 1 else self.manager.frame_start
+                self.interpolator.save()
+                self.step(state, held | self.serve_inputs(until))
+                if state.finished:
+                    break
+        else:
+            self.serve_events.clear()  # Presses while the closing message is up don't carry over
+        self.scheduler.advance(ticks * tick_time)
+        PROFILER.mark("physics")
+
+        if state.finished and self.ending is None:
+            self.finish()
+
+    def serve_inputs(self, until):
+        inputs = 0
+        while self.serve_events and self.serve_events[0].arrived <= until:
+            bit = INPUT_SERVE_PRESS if self.serve_events[0].type == pygame.KEYDOWN else INPUT_SERVE_RELEASE
+            # step() applies a press before a release, so a release then a new press wait a tick
+            if inputs & bit or (bit == INPUT_SERVE_PRESS and inputs & INPUT_SERVE_RELEASE):
+                break
+            inputs |= bit
+            LATENCY.input(self.serve_events.pop(0).arrived)
+        return inputs
+
+    def latch_paddles(self):
+        # Late input sampling: reads the keys again just before drawing and shows the
+        # keyboard's paddles heading where they now point, instead of trailing the last
+        # tick. Only the picture changes; the simulation gets the keys next frame as usual.
+        for event in self.manager.poll():
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in KEY_INPUTS:
+                event.latched = True
+                LATENCY.input(event.arrived)
+        current = [(player.x, player.y) for player in self.state.players]
+        players = move_players(self.state, inputs_from_keys(pygame.key.get_pressed()))
+        alpha = self.timestep.alpha
+        latched = []
+        for player, (x, y) in zip(self.state.players, current):
+            if player in players:
+                latched.append((player, x + (player.x - x) * alpha, y + (player.y - y) * alpha))
+            player.x, player.y = x, y
+        return latched
+
+    def overlays(self):
+        # Callbacks drawing on top of this frame
+        overlays = [lambda win: HUD.draw(win, self.renderer)] if HUD.visible else []
+        if self.ending is not None:
+            overlays.append(lambda win: draw_message(win, self.message))
+        return overlays
+
+    def draw(self, win):
+        draw_state(win, self.state, self.renderer, self.overlays())
+
+    def finish(self):
+        if self.message is None:
+            self.manager.pop(self)
+            return
+        self.interpolator.save()  # Hold the last tick still instead of easing towards it
+        self.ending = self.scheduler.start(self.show_ending())
+
+    def show_ending(self):
+        # The message stays over the finished court while frames keep coming, then the mode
+        # ends or, for repeating drills, starts another round
+        yield MESSAGE_SECONDS
+        self.ending = None
+        if not self.repeat:
+            self.manager.pop(self)
+            return
+        self.state.score = 0
+        if self.recorder is not None:
+            self.recorder.keyframe(self.state)  # The reset happened outside step()
+
+    def render(self, win):
+        if self.level is not GRAPHICS.level:
+            self.renderer, self.level = quality_changed(win)
+        latched = self.latch_paddles() if LATE_INPUT and self.late_input and self.ending is None else ()
+        with self.interpolator.at(self.timestep.alpha):
+            for player, x, y in latched:
+                player.x, player.y = x, y
+            self.draw(win)
+        LATENCY.presented()
+        PROFILER.mark("draw")
+        GRAPHICS.record(time.perf_counter() - self.manager.frame_start)
+
+
+# Forehand and backhand drills, with a map of where the shots went; H hides it
+class DrillScene(ModeScene):
+    show_heatmap = True
+
+    def enter(self, manager):
+        from heatmap import ShotHeatmap  # Imported when a drill starts rather than at startup
+
+        super().enter(manager)
+        self.heatmap = ShotHeatmap(self.state.mode, self.step)
+        self.step = self.heatmap.step
+
+    def exit(self):
+        if HEATMAP_DIR is not None and any(self.heatmap.totals().values()):
+            save_heatmap(self.heatmap)
+        super().exit()
+        self.heatmap = None
+
+    def update(self, events, frame_time):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                DrillScene.show_heatmap = not DrillScene.show_heatmap
+                if self.renderer is not None:
+                    self.renderer.invalidate()  # Wipe the panel when it is hidden
+        super().update(events, frame_time)
+
+    def overlays(self):
+        overlays = super().overlays()
+        if self.show_heatmap:
+            width, height = self.heatmap.size
+            overlays.append(lambda win: self.heatmap.draw(win, (WIDTH - width - 10, (HEIGHT - height) // 2)))
+        return overlays
+
+
+# Balls keep coming from a machine at the bottom, many at once; up and down arrows double
+# and halve the rate. Replays and session stats only know one-ball modes, so it isn't recorded.
+class BallMachineScene(ModeScene):
+    def __init__(self, state, caption):
+        from ballmachine import step_ball_machine
+
+        super().__init__(state, step_ball_machine, caption, record=False)
+
+    def enter(self, manager):
+        super().enter(manager)
+        HUD.ball_machine = self.state
+
+    def exit(self):
+        super().exit()
+        HUD.ball_machine = None
+
+    def interpolated(self):
+        return self.state.players  # The balls interpolate from their own previous positions
+
+    def update(self, events, frame_time):
+        from ballmachine import MAX_RATE, MIN_RATE
+
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_UP:
+                self.state.rate = min(self.state.rate * 2, MAX_RATE)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_DOWN:
+                self.state.rate = max(self.state.rate // 2, MIN_RATE)
+        super().update(events, frame_time)
+
+    def draw(self, win):
+        draw_ball_machine(win, self.state, self.timestep.alpha, self.renderer, self.overlays())
+
+
+# Plays a recording back; left/right arrows seek 10 s, escape stops
+class ReplayScene(Scene):
+    event_types = ()
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+
+    def enter(self, manager):
+        super().enter(manager)
+        self.player = ReplayPlayer.load(self.path)
+        pygame.display.set_caption(f"Ace Academy - Replay ({self.player.mode})")
+        load_game_assets()
+        self.renderer = create_renderer(manager.window)
+        self.level = GRAPHICS.level
+        self.timestep = FixedTimestep(TICK_RATE * self.speed)
+
+    def exit(self):
+        self.player = self.renderer = None
+
+    def update(self, events, frame_time):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.manager.pop(self)
+                return
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RIGHT:
+                with SOUNDS.muted():
+                    self.player.seek(self.player.tick + 10 * TICK_RATE)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
+                with SOUNDS.muted():
+                    self.player.seek(self.player.tick - 10 * TICK_RATE)
+
+        self.player.advance(self.timestep.advance(frame_time))
+        if self.player.finished:
+            self.manager.pop(self)
+
+    def render(self, win):
+        if self.level is not GRAPHICS.level:
+            self.renderer, self.level = quality_changed(win)
+        draw_state(win, self.player.state, self.renderer)
+
+
+# Network inputs arrive from outside the step function, so these matches aren't recorded
+class NetworkScene(ModeScene):
+    late_input = False  # Which paddle the keys drive depends on the session
+
+    def __init__(self, session, caption):
+        super().__init__(session.state, session.step, caption, record=False)
+        self.session = session
+
+    def enter(self, manager):
+        super().enter(manager)
+        HUD.network = self.session.link.stats
+
+    def exit(self):
+        super().exit()
+        HUD.network = None
+        self.session.link.close()
+
+    def update(self, events, frame_time):
+        try:
+            super().update(events, frame_time)
+        except ConnectionError as error:
+            print(error, file=sys.stderr)
+            self.manager.pop(self)
+
+
+# A pygame_menu menu drawn over whatever was on screen. It only redraws after an event, a
+# change pygame_menu reports or an idle timeout, so a menu left open sleeps in the frame
+# cap; F3 shows what it costs in CPU time per second.
+class MenuScene(Scene):
+    def __init__(self, menu, caption=None):
+        self.menu = menu
+        self.caption = caption
+
+    def enter(self, manager):
+        super().enter(manager)
+        self.cpu = CpuMeter()
+        self.resume()
+
+    def exit(self):
+        self.menu = None
+
+    def resume(self):
+        if self.caption:
+            pygame.display.set_caption(self.caption)
+        self.redraw = True
+
+    def idle_timeout(self):
+        return None if self.redraw else MENU_IDLE_TIMEOUT
+
+    def update(self, events, frame_time):
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                HUD.toggle()
+        changed = self.menu.update(events)
+        self.redraw = self.redraw or changed or bool(events) or self.manager.idle_wake
+
+    def render(self, win):
+        drew = self.redraw
+        if self.redraw:
+            self.redraw = False
+            self.draw(win)
+        if self.cpu.sample(drew) and HUD.visible:
+            self.redraw = True  # Show the new reading
+
+    def draw(self, win):
+        self.menu.draw(win)
+        if HUD.visible and self.cpu.per_second is not None:
+            text = fonts.get_font(FONT_NAME, HUD.FONT_SIZE).render(
+                f"menu cpu {self.cpu.per_second * 1000:.1f} ms/s  {self.cpu.frames_per_second:.1f} frames/s",
+                GRAPHICS.level.antialias, WHITE)
+            win.fill(BLACK, (10, HEIGHT - text.get_height() - 10, text.get_width(), text.get_height()))
+            win.blit(text, (10, HEIGHT - text.get_height() - 10))
+        pygame.display.update()
+
+
+class MainMenuScene(MenuScene):
+    def __init__(self, menu, startup_profile=False):
+        super().__init__(menu, "Ace Academy - Main Menu")
+        self.startup_profile = startup_profile
+        self.first_frame = True
+
+    def draw(self, win):
+        super().draw(win)
+        if self.first_frame:
+            self.first_frame = False
+            mark_startup("first frame")
+            if self.startup_profile:
+                print_startup_profile()
+
+
+SCENES = SceneManager(FPS)
+
+
+# netplay and the socket module are only imported once a network game starts
+def host_network_game(port=None):
+    # The host plays the top paddle with WASD and waits for a client before the match starts
+    import netplay
+
+    port = port or netplay.DEFAULT_PORT
+    link = netplay.Link(("0.0.0.0", port), **NET_CONDITIONS)
+    SCENES.push(NetworkScene(netplay.NetHost(link), f"Ace Academy - Hosting on port {port}"))
+
+
+def join_network_game(address):
+    # The client plays the bottom paddle with either the arrows or WASD
+    import socket
+
+    import netplay
+
+    host, _, port = address.partition(":")
+    link = netplay.Link(**NET_CONDITIONS)
+    client = netplay.NetClient(link, (socket.gethostbyname(host), int(port or netplay.DEFAULT_PORT)))
+    SCENES.push(NetworkScene(client, f"Ace Academy - Connected to {address}"))
+
+
+def start_vs_player_game():
+    SCENES.push(ModeScene(MatchState(MODE_VS_PLAYER), step, "Ace Academy - VS Player Mode"))
+
+
+def start_vs_ai_gamemode():
+    # Left player against the computer-controlled right player
+    SCENES.push(ModeScene(MatchState(MODE_VS_AI, ai=make_ai(AI_OPPONENT)), step, "Ace Academy - VS AI Mode"))
+
+
+def select_opponent(name):
+    global AI_OPPONENT
+    AI_OPPONENT = name
+
+
+def set_player_name(name):
+    global PLAYER_NAME
+    PLAYER_NAME = name.strip() or DEFAULT_PLAYER
+
+
+def start_forehand_learning():
+    # Keeps feeding balls, resetting the count after every 10 forehands
+    SCENES.push(DrillScene(DrillState(MODE_FOREHAND), step_drill, "Ace Academy - Forehand Learning Mode",
+                          "You managed to hit 10 forehand shots", repeat=True))
+
+
+def start_backhand_learning():
+    SCENES.push(DrillScene(DrillState(MODE_BACKHAND), step_drill, "Ace Academy - Backhand Learning Mode",
+                          "You managed to hit 10 backhand shots"))
+
+
+def start_serve_learning():
+    SCENES.push(ModeScene(DrillState(MODE_SERVE), step_drill, "Ace Academy - Serve Learning Mode",
+                          "Congratulations! You served 10 times!"))
+
+
+def start_ball_machine():
+    from ballmachine import DEFAULT_RATE, MAX_RATE, MIN_RATE, BallMachineState
+
+    rate = DEFAULT_RATE if BALL_RATE is None else min(max(BALL_RATE, MIN_RATE), MAX_RATE)
+    SCENES.push(BallMachineScene(BallMachineState(rate), "Ace Academy - Ball Machine"))
+
+
+def build_pause_menu(scene):
+    import pygame_menu
+
+    pause = pygame_menu.Menu("Paused", 500, 300, theme=pygame_menu.themes.THEME_SOLARIZED)
+    pause.add.button("Resume", SCENES.pop)
+    pause.add.button("Quit to Menu", lambda: SCENES.pop(scene))
+    return pause
+
+
+MODE_TITLES = {
+    MODE_VS_AI: "VS AI", MODE_VS_PLAYER: "VS Player",
+    MODE_FOREHAND: "Forehand", MODE_BACKHAND: "Backhand", MODE_SERVE: "Serve",
+}
+
+
+def progress_line(mode, rows):
+    if mode in (MODE_VS_AI, MODE_VS_PLAYER):
+        return ", ".join(f"{score}-{opponent_score}" for _, score, opponent_score, _, _, _ in rows)
+    if mode == MODE_SERVE:
+        return ", ".join(f"{score} ({power:.1f})" if power is not None else str(score) for _, score, _, _, _, power in rows)
+    return ", ".join(f"{score}/{contacts}" for _, score, _, _, contacts, _ in rows)
+
+
+# The Stats page. Its queries run on the stats thread each time it opens, and the
+# labels are filled in once they have all come back.
+class StatsPage:
+    def __init__(self, menu):
+        self.menu = menu
+        self.futures = None
+        menu.set_onbeforeopen(lambda *_: self.load())
+        menu.set_onupdate(self.update)
+
+    def load(self):
+        self.futures = {mode: (STATS.leaderboard(mode), STATS.progress(PLAYER_NAME, mode)) for mode in MODES}
+        for pair in self.futures.values():
+            for future in pair:
+                # Wakes an idle menu so the results show as soon as they are in
+                future.add_done_callback(lambda _: pygame.event.post(pygame.event.Event(MENU_REFRESH)))
+        self.show(["Loading..."])
+
+    def update(self):
+        if self.futures is None or not all(future.done() for pair in self.futures.values() for future in pair):
+            return
+        futures, self.futures = self.futures, None
+        try:
+            results = {mode: (best.result(), latest.result()) for mode, (best, latest) in futures.items()}
+        except Exception as error:  # Whatever the query raised
+            self.show([f"Stats unavailable: {error}"])
+            return
+
+        lines = ["Best scores"]
+        for mode, (best, _) in results.items():
+            ranking = "  ".join(f"{place}. {name} {score}" for place, (name, score, _, _) in enumerate(best, 1))
+            lines.append(f"{MODE_TITLES[mode]}: {ranking or '-'}")
+        lines.append(f"Recent sessions for {PLAYER_NAME}")
+        for mode, (_, latest) in results.items():
+            lines.append(f"{MODE_TITLES[mode]}: {progress_line(mode, latest) or '-'}")
+        self.show(lines)
+
+    def show(self, lines):
+        import pygame_menu
+
+        self.menu.clear(reset=False)  # A full reset would close the page while it opens
+        for line in lines:
+            self.menu.add.label(line, font_size=22)
+        self.menu.add.button("Back", pygame_menu.events.BACK)
+
+
+# Menus need an open display, so they are built once the window exists
+def build_menus():
+    import pygame_menu  # Deferred until the menu is shown; it is slow to import
+
+    menus = {}
+
+    def build_gamemode():
+        gamemode = pygame_menu.Menu("Select Gamemode", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
+        gamemode.add.button("Learn", open_menu("learn"))
+        gamemode.add.selector("Opponent: ", [(name.capitalize(), name) for name in OPPONENTS],
+                              default=OPPONENTS.index(AI_OPPONENT), onchange=lambda _, name: select_opponent(name))
+        gamemode.add.button("VS AI", start_vs_ai_gamemode)
+        gamemode.add.button("VS Player", start_vs_player_game)  # Start "VS Player" mode
+        return gamemode
+
+    def build_options():
+        options = pygame_menu.Menu("Options", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
+        levels = sorted(VOLUMES)
+        options.add.selector("Volume:", [("Low", 1), ("Medium", 2), ("High", 3)],
+                             default=levels.index(min(levels, key=lambda level: abs(VOLUMES[level] - SOUNDS.volume))),
+                             onchange=lambda _, level: SOUNDS.set_volume(VOLUMES[level]))
+        options.add.selector("Graphics:", [(setting.capitalize(), setting) for setting in GRAPHICS_SETTINGS],
+                             default=GRAPHICS_SETTINGS.index(GRAPHICS.setting), onchange=lambda _, setting: GRAPHICS.set(setting))
+        return options
+
+    def build_learn():
+        learn = pygame_menu.Menu("Learn Menu", 1063, 1001, theme=pygame_menu.themes.THEME_GREEN)
+        learn.add.button("Forhand", start_forehand_learning)
+        learn.add.button("Backhand", start_backhand_learning)
+        learn.add.button("Serve", start_serve_learning)
+        learn.add.button("Ball Machine", start_ball_machine)
+        return learn
+
+    def build_stats():
+        stats = pygame_menu.Menu("Stats", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
+        StatsPage(stats)  # Kept alive by the callbacks it registers on the menu
+        return stats
+
+    builders = {"gamemode": build_gamemode, "options": build_options, "learn": build_learn, "stats": build_stats}
+
+    def open_menu(name):
+        # Submenus are only built the first time they are opened
+        def open_submenu():
+            if name not in menus:
+                menus[name] = builders[name]()
+            mainmenu._open(menus[name])
+        return open_submenu
+
+    # Main menu setup
+    mainmenu = pygame_menu.Menu("Ace Academy", 1063, 1001, theme=pygame_menu.themes.THEME_SOLARIZED)
+    mainmenu.add.text_input("Name: ", default="", maxchar=20, onchange=set_player_name)
+    mainmenu.add.button("Select Gamemode", open_menu("gamemode"))
+    mainmenu.add.button("Stats", open_menu("stats"))
+    mainmenu.add.button("Options", open_menu("options"))
+    mainmenu.add.button("Quit", SCENES.quit)
+
+    return mainmenu
+
+
+def load_sounds():
+    if SOUND:
+        SOUNDS.load()
+    else:
+        pygame.mixer.quit()  # pygame.init() opens the audio device regardless
+
+
+# Main menu loop
+def run_main_menu(startup_profile=False):
+    mark_startup("imports")
+    pygame.init()  # pygame_menu insists on a full init
+    SCENES.open((WIDTH, HEIGHT), "Ace Academy - Main Menu")
+    mark_startup("display")
+    load_sounds()
+    mark_startup("sounds")
+    score_font()
+    mark_startup("fonts")
+    mainmenu = build_menus()
+    mark_startup("menus")
+    SCENES.push(MainMenuScene(mainmenu, startup_profile))
+    SCENES.run()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ace Academy tennis")
+    parser.add_argument("--startup-profile", action="store_true", help="print time spent in each startup phase")
+    parser.add_argument("--no-font-cache", action="store_true", help="don't read or write the resolved font path cache")
+    parser.add_argument("--record", metavar="DIR", help="save a replay of every mode played into DIR")
+    parser.add_argument("--heatmap-dir", metavar="DIR", help="export each forehand/backhand drill's shot heatmap (CSV and PNG) into DIR")
+    parser.add_argument("--replay", metavar="FILE", help="watch a recorded replay instead of opening the menu")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="playback speed for --replay")
+    parser.add_argument("--graphics", choices=GRAPHICS_SETTINGS, default=GRAPHICS.setting, help="graphics quality (default %(default)s)")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler and its overlay on (F3 toggles)")
+    parser.add_argument("--host", metavar="PORT", type=int, nargs="?", const=0,
+                        help="host a two-player network match (default port 47800)")
+    parser.add_argument("--join", metavar="HOST[:PORT]", help="join a network match hosted with --host")
+    parser.add_argument("--net-latency", type=float, default=0.0, metavar="MS", help="simulated one-way latency for network play")
+    parser.add_argument("--net-jitter", type=float, default=0.0, metavar="MS", help="simulated extra random latency for network play")
+    parser.add_argument("--net-loss", type=float, default=0.0, metavar="FRACTION", help="simulated packet loss for network play")
+    parser.add_argument("--profile-out", metavar="FILE", help="write frame timings to FILE (.csv or .json) when a mode ends")
+    parser.add_argument("--stats-db", metavar="FILE", default=STATS_PATH, help="player statistics database (default %(default)s)")
+    parser.add_argument("--no-stats", action="store_true", help="don't record player statistics")
+    parser.add_argument("--no-sound", action="store_true", help="don't open the audio device")
+    parser.add_argument("--audio-buffer", type=int, default=MIXER_BUFFER, metavar="SAMPLES",
+                        help="mixer buffer size; smaller starts sounds sooner but may crackle (default %(default)s)")
+    parser.add_argument("--ball-rate", type=int, metavar="BALLS",
+                        help="balls per second the ball machine starts at; up/down arrows change it in play (default 20)")
+    parser.add_argument("--capture", metavar="DIR", help="save every frame shown as a PNG in DIR")
+    parser.add_argument("--capture-command", metavar="COMMAND",
+                        help="pipe raw frames into COMMAND instead, formatted with {width} {height} {fps} {pix_fmt}, e.g. "
+                             "\"ffmpeg -f rawvideo -pix_fmt {pix_fmt} -s {width}x{height} -r {fps} -i - drill.mp4\"")
+    parser.add_argument("--capture-pool", type=int, metavar="FRAMES",
+                        help="frames waiting to be written before new ones are dropped (default 8)")
+    parser.add_argument("--late-input", action="store_true", help="read the keys again just before each frame is drawn")
+    parser.add_argument("--latency", action="store_true", help="measure input-to-present latency and print it when a mode ends")
+    parser.add_argument("--latency-out", metavar="FILE", help="also write each frame's input latency to FILE as CSV")
+    return parser.parse_args(argv)
+
+
+# Start the main menu loop
+if __name__ == "__main__":
+    args = parse_args()
+    fonts.use_disk_cache = not args.no_font_cache
+    RECORD_DIR = args.record
+    HEATMAP_DIR = args.heatmap_dir
+    PROFILE_OUT = args.profile_out
+    LATE_INPUT = args.late_input
+    BALL_RATE = args.ball_rate
+    LATENCY_OUT = args.latency_out
+    LATENCY.enable(args.latency or LATENCY_OUT is not None)
+    HUD.visible = args.profile
+    PROFILER.target_fps = FPS
+    GRAPHICS.target_fps = FPS
+    GRAPHICS.set(args.graphics)
+    PROFILER.enable(args.profile or PROFILE_OUT is not None)
+    SOUND = not args.no_sound
+    if SOUND:
+        SOUNDS.pre_init(args.audio_buffer)
+    if not args.no_stats:
+        STATS.open(args.stats_db)
+    if args.capture or args.capture_command:
+        from capture import CAPTURE, POOL_FRAMES
+
+        CAPTURE.start(args.capture, args.capture_command, FPS, POOL_FRAMES if args.capture_pool is None else max(args.capture_pool, 1))
+        SCENES.after_render.append(CAPTURE.grab)
+    NET_CONDITIONS.update(latency=args.net_latency / 1000, jitter=args.net_jitter / 1000, loss=args.net_loss)
+    if args.replay or args.host is not None or args.join:
+        # Straight into a single scene; the app closes when it ends
+        pygame.init()
+        SCENES.open((WIDTH, HEIGHT))
+        load_sounds()
+        if args.replay:
+            SCENES.push(ReplayScene(args.replay, args.replay_speed))
+        elif args.host is not None:
+            host_network_game(args.host)
+        else:
+            join_network_game(args.join)
+        SCENES.run()
+    else:
+        run_main_menu(args.startup_profile)  # Run the main menu system
+    STATS.close()
+    if CAPTURE is not None:
+        CAPTURE.stop()
+        capture = CAPTURE.stats()
+        print(f"captured {capture['written']} frames, dropped {capture['dropped']}")
+    pygame.quit()
@@ -0,0 +1,337 @@
+import heapq
+import random
+import socket
+import struct
+import time
+from collections import deque
+
+from engine import (
+    INPUT_LEFT_PLAYER_LEFT, INPUT_LEFT_PLAYER_RIGHT, INPUT_LEFT_PLAYER_UP, INPUT_LEFT_PLAYER_DOWN,
+    INPUT_RIGHT_PLAYER_LEFT, INPUT_RIGHT_PLAYER_RIGHT, INPUT_RIGHT_PLAYER_UP, INPUT_RIGHT_PLAYER_DOWN,
+    INPUT_SERVE_EVENTS, MODE_VS_PLAYER,
+    MatchState, InputKeys, handle_player_movement, step,
+)
+from replay import MATCH_FIELDS, get_field, set_field
+
+# Two-player matches over UDP. The host runs the only real simulation and plays the
+# top (left) paddle; the client sends its input bitmask every tick and draws whatever
+# the host last told it, except for its own paddle, which it moves straight away and
+# corrects when the host's snapshot catches up. Snapshots only carry the fields that
+# changed since the last snapshot the client acknowledged.
+
+DEFAULT_PORT = 47800
+LEFT_INPUTS = INPUT_LEFT_PLAYER_LEFT | INPUT_LEFT_PLAYER_RIGHT | INPUT_LEFT_PLAYER_UP | INPUT_LEFT_PLAYER_DOWN
+RIGHT_INPUTS = INPUT_RIGHT_PLAYER_LEFT | INPUT_RIGHT_PLAYER_RIGHT | INPUT_RIGHT_PLAYER_UP | INPUT_RIGHT_PLAYER_DOWN
+
+PACKET_INPUT = 1
+PACKET_SNAPSHOT = 2
+# Each side stamps its packets with its own clock and echoes the other's newest stamp along
+# with how long it held it, so both measure round-trip time without comparing clocks.
+# type, newest input sequence, acknowledged snapshot tick, client send time, echoed host send time,
+# seconds held by the client, input count
+INPUT_HEADER = struct.Struct("<BIIdddB")
+# type, tick, base tick, last applied input sequence, host send time, echoed client send time,
+# seconds held by the host, changed-field mask
+SNAPSHOT_HEADER = struct.Struct("<BIIIdddI")
+NO_BASE = 0xFFFFFFFF  # base tick of a full snapshot
+
+INPUT_REDUNDANCY = 8  # Each input packet repeats this many recent inputs, so a lost packet costs nothing
+SNAPSHOT_HISTORY = 64  # Snapshots either side keeps as possible delta bases
+MAX_PENDING_INPUTS = 4  # Host drops older client inputs beyond this rather than fall further behind
+TIMEOUT = 5.0  # Seconds without hearing from the other side before giving up
+
+
+class NetStats:
+    def __init__(self, window=1.0):
+        self.window = window
+        self.sent = deque()  # (time, bytes)
+        self.received = deque()
+        self.total_sent = 0
+        self.total_received = 0
+        self.rtt = None  # Smoothed round-trip time in seconds
+        self.missed = 0  # Packets that never arrived, as far as sequence gaps tell
+
+    def record(self, history, size, now):
+        history.append((now, size))
+        while history and history[0][0] < now - self.window:
+            history.popleft()
+
+    def on_send(self, size, now):
+        self.total_sent += size
+        self.record(self.sent, size, now)
+
+    def on_receive(self, size, now):
+        self.total_received += size
+        self.record(self.received, size, now)
+
+    def on_rtt(self, sample):
+        self.rtt = sample if self.rtt is None else 0.9 * self.rtt + 0.1 * sample
+
+    def summary(self, now=None):
+        now = time.perf_counter() if now is None else now
+        return {
+            "rtt_ms": (self.rtt or 0.0) * 1000,
+            "sent_bytes_per_sec": sum(size for sent_at, size in self.sent if sent_at >= now - self.window) / self.window,
+            "received_bytes_per_sec": sum(size for received_at, size in self.received if received_at >= now - self.window) / self.window,
+            "total_sent": self.total_sent,
+            "total_received": self.total_received,
+            "missed": self.missed,
+        }
+
+
+# A non-blocking UDP socket that can pretend to be a bad connection: outgoing packets
+# are held back by latency (plus up to jitter) and dropped with probability loss.
+class Link:
+    def __init__(self, bind=("0.0.0.0", 0), latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(bind)
+        self.socket.setblocking(False)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.queue = []  # (due time, order, data, address)
+        self.order = 0
+        self.stats = NetStats()
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def send(self, data, address, now=None):
+        now = time.perf_counter() if now is None else now
+        self.stats.on_send(len(data), now)  # Counted when sent; the simulated network may still drop it
+        if self.loss and self.rng.random() < self.loss:
+            return
+        if not self.latency and not self.jitter:
+            self.socket.sendto(data, address)
+            return
+        due = now + self.latency + self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.queue, (due, self.order, data, address))
+        self.order += 1
+
+    def flush(self, now=None):
+        now = time.perf_counter() if now is None else now
+        while self.queue and self.queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.queue)
+            self.socket.sendto(data, address)
+
+    def receive(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self.flush(now)
+        packets = []
+        while True:
+            try:
+                data, address = self.socket.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            self.stats.on_receive(len(data), now)
+            packets.append((data, address))
+        return packets
+
+    def close(self):
+        self.socket.close()
+
+
+def snapshot_values(state):
+    return tuple(float(get_field(state, field)) for field in MATCH_FIELDS)
+
+
+def remember(history, tick, values, newest):
+    # Keeps values as a possible delta base and forgets every snapshot SNAPSHOT_HISTORY or
+    # more ticks older than newest; with packets lost or reordered, ticks don't arrive one by one
+    oldest = newest - SNAPSHOT_HISTORY
+    if tick > oldest:
+        history[tick] = values
+    for stale in [kept for kept in history if kept <= oldest]:
+        del history[stale]
+
+
+def encode_delta(values, base):
+    # Mask of the fields that differ from base (all of them without one) and their values
+    mask = 0
+    changed = []
+    for index, value in enumerate(values):
+        if base is None or base[index] != value:
+            mask |= 1 << index
+            changed.append(value)
+    return mask, struct.pack(f"<{len(changed)}d", *changed)
+
+
+def decode_delta(mask, data, base):
+    values = list(base) if base is not None else [0.0] * len(MATCH_FIELDS)
+    changed = iter(struct.unpack(f"<{bin(mask).count('1')}d", data))
+    for index in range(len(MATCH_FIELDS)):
+        if mask & (1 << index):
+            values[index] = next(changed)
+    return tuple(values)
+
+
+class NetHost:
+    def __init__(self, link, state=None, step_function=step):
+        self.link = link
+        self.state = state or MatchState(MODE_VS_PLAYER)
+        self.step_function = step_function
+        self.peer = None
+        self.last_heard = None
+        self.received_sequence = 0  # Newest client input seen
+        self.applied_sequence = 0  # Newest client input used in a tick
+        self.pending = deque()  # (sequence, inputs) not yet applied
+        self.held_inputs = 0  # Movement keys the client is holding, reused when its packets are late
+        self.client_ack = NO_BASE
+        self.echo = (0.0, 0.0)  # (client send time, when it arrived)
+        self.history = {}  # tick -> snapshot values
+
+    @property
+    def connected(self):
+        return self.peer is not None
+
+    def poll(self, now=None):
+        now = time.perf_counter() if now is None else now
+        for data, address in self.link.receive(now):
+            if len(data) < INPUT_HEADER.size or data[0] != PACKET_INPUT:
+                continue
+            if self.peer is None:
+                self.peer = address  # First client to speak gets the seat
+            elif address != self.peer:
+                continue
+            self.last_heard = now
+            _, sequence, ack, sent_at, echoed, held, count = INPUT_HEADER.unpack_from(data)
+            if ack != NO_BASE and (self.client_ack == NO_BASE or ack > self.client_ack):
+                self.client_ack = ack
+            if sequence <= self.received_sequence:
+                continue  # Reordered or duplicate
+            self.echo = (sent_at, now)
+            if echoed:
+                self.link.stats.on_rtt(now - echoed - held)
+            inputs = struct.unpack_from(f"<{count}H", data, INPUT_HEADER.size)
+            first = sequence - count + 1
+            if first > self.received_sequence + 1:
+                self.link.stats.missed += first - self.received_sequence - 1
+            for offset, value in enumerate(inputs):
+                if first + offset > self.received_sequence:
+                    self.pending.append((first + offset, value))
+            self.received_sequence = sequence
+
+    def client_inputs(self):
+        # One client input per tick; serve presses from dropped backlog are kept so a tap is never lost
+        serve_events = 0
+        while len(self.pending) > MAX_PENDING_INPUTS:
+            _, inputs = self.pending.popleft()
+            serve_events |= inputs & INPUT_SERVE_EVENTS
+        if self.pending:
+            self.applied_sequence, inputs = self.pending.popleft()
+            self.held_inputs = inputs & RIGHT_INPUTS
+            return inputs | serve_events
+        return self.held_inputs | serve_events
+
+    def step(self, state, inputs):
+        # Drop-in step function for the host: local keys drive the top paddle, the client the bottom one
+        now = time.perf_counter()
+        self.poll(now)
+        if self.peer is None:
+            return  # Hold the match until someone joins
+        if self.timed_out(now):
+            raise ConnectionError("lost connection to the client")
+        local = inputs & LEFT_INPUTS
+        remote = self.client_inputs()
+        remote &= RIGHT_INPUTS | INPUT_SERVE_EVENTS
+        # Whoever is serving owns the serve key
+        if state.left_serve:
+            local |= inputs & INPUT_SERVE_EVENTS
+            remote &= ~INPUT_SERVE_EVENTS
+        self.step_function(state, local | remote)
+        self.send_snapshot(state, now)
+
+    def send_snapshot(self, state, now):
+        values = snapshot_values(state)
+        remember(self.history, state.tick, values, state.tick)
+        if self.peer is None:
+            return
+        base = self.history.get(self.client_ack)
+        mask, body = encode_delta(values, base)
+        sent_at, arrived = self.echo
+        header = SNAPSHOT_HEADER.pack(PACKET_SNAPSHOT, state.tick, self.client_ack if base is not None else NO_BASE,
+                                      self.applied_sequence, now, sent_at, now - arrived, mask)
+        self.link.send(header + body, self.peer, now)
+
+    def timed_out(self, now=None):
+        now = time.perf_counter() if now is None else now
+        return self.last_heard is not None and now - self.last_heard > TIMEOUT
+
+
+class NetClient:
+    def __init__(self, link, host, state=None):
+        self.link = link
+        self.host = host
+        self.state = state or MatchState(MODE_VS_PLAYER)
+        self.sequence = 0
+        self.unacked = deque()  # (sequence, inputs) the host hasn't confirmed applying yet
+        self.history = {}  # tick -> snapshot values
+        self.latest_tick = NO_BASE
+        self.echo = (0.0, 0.0)  # (host send time of the newest snapshot, when it arrived)
+        self.started = time.perf_counter()
+        self.last_heard = None
+
+    @property
+    def connected(self):
+        return self.last_heard is not None
+
+    def send_inputs(self, inputs, now):
+        self.sequence += 1
+        self.unacked.append((self.sequence, inputs))
+        recent = [value for _, value in list(self.unacked)[-INPUT_REDUNDANCY:]]
+        host_sent_at, arrived = self.echo
+        header = INPUT_HEADER.pack(PACKET_INPUT, self.sequence, self.latest_tick, now, host_sent_at,
+                                   now - arrived if host_sent_at else 0.0, len(recent))
+        self.link.send(header + struct.pack(f"<{len(recent)}H", *recent), self.host, now)
+
+    def poll(self, now=None):
+        now = time.perf_counter() if now is None else now
+        newest = None
+        for data, _ in self.link.receive(now):
+            if len(data) < SNAPSHOT_HEADER.size or data[0] != PACKET_SNAPSHOT:
+                continue
+            _, tick, base_tick, applied, host_sent_at, sent_at, held, mask = SNAPSHOT_HEADER.unpack_from(data)
+            if base_tick != NO_BASE and base_tick not in self.history:
+                continue  # Its base has already been forgotten; a later snapshot will do
+            values = decode_delta(mask, data[SNAPSHOT_HEADER.size:], self.history.get(base_tick))
+            remember(self.history, tick, values, tick if self.latest_tick == NO_BASE else max(tick, self.latest_tick))
+            self.last_heard = now
+            if sent_at:
+                self.link.stats.on_rtt(now - sent_at - held)
+            if self.latest_tick == NO_BASE or tick > self.latest_tick:
+                if self.latest_tick != NO_BASE and tick > self.latest_tick + 1:
+                    self.link.stats.missed += tick - self.latest_tick - 1
+                self.latest_tick = tick
+                self.echo = (host_sent_at, now)
+                newest = (values, applied)
+        return newest
+
+    def step(self, state, inputs):
+        # Drop-in step function for the client; either set of movement keys moves the bottom paddle
+        now = time.perf_counter()
+        inputs = (inputs & (RIGHT_INPUTS | INPUT_SERVE_EVENTS)) | ((inputs & LEFT_INPUTS) << 4)
+        self.send_inputs(inputs, now)
+
+        newest = self.poll(now)
+        if newest is not None:
+            values, applied = newest
+            for field, value in zip(MATCH_FIELDS, values):
+                set_field(state, field, value)
+            # Reconcile: start from where the host has our paddle and replay what it hasn't seen yet
+            while self.unacked and self.unacked[0][0] <= applied:
+                self.unacked.popleft()
+            for _, pending in self.unacked:
+                handle_player_movement(InputKeys(pending & RIGHT_INPUTS), state.left_player, state.right_player)
+        else:
+            # Predict just our own paddle until the host catches up
+            handle_player_movement(InputKeys(inputs & RIGHT_INPUTS), state.left_player, state.right_player)
+
+        if self.timed_out(now):
+            raise ConnectionError("lost connection to the host")
+
+    def timed_out(self, now=None):
+        now = time.perf_counter() if now is None else now
+        return now - (self.last_heard or self.started) > TIMEOUT
+
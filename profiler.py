@@ -0,0 +1,177 @@
+import csv
+import json
+import time
+from collections import deque
+
+# Per-phase frame timing. Code calls mark(phase) after each piece of work and the time
+# since the previous mark is charged to that phase; a phase marked several times in
+# one frame (once per physics tick, say) adds up. When disabled, callers only pay for
+# checking PROFILER.enabled.
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, target_fps=60, history=600):
+        self.target_fps = target_fps
+        self.enabled = False
+        self.frames = deque(maxlen=history)  # (frame interval, {phase: seconds}) for recent frames
+        self.dropped_frames = 0
+        self.total_frames = 0
+        self._frame_start = None
+        self._last_mark = None
+        self._phases = {}
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self._frame_start = None
+
+    def begin_frame(self, idled=False):
+        # idled: the frame now ending slept past the frame cap on purpose, e.g. a menu waiting
+        # for input, so it is not a dropped frame however long it took
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            interval = now - self._frame_start
+            self.frames.append((interval, self._phases))
+            self.total_frames += 1
+            # The frame cap sleeps up to one budget, so anything much longer missed a refresh
+            if not idled and interval > 1.5 / self.target_fps:
+                self.dropped_frames += 1
+        self._frame_start = self._last_mark = now
+        self._phases = {}
+
+    def mark(self, phase):
+        if not self.enabled or self._last_mark is None:
+            return
+        now = time.perf_counter()
+        self._phases[phase] = self._phases.get(phase, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def summary(self):
+        intervals = sorted(interval for interval, _ in self.frames)
+        phases = {}
+        for _, frame_phases in self.frames:
+            for phase, seconds in frame_phases.items():
+                phases[phase] = phases.get(phase, 0.0) + seconds
+        count = len(self.frames) or 1
+        return {
+            "frames": len(self.frames),
+            "fps": len(intervals) / sum(intervals) if intervals else 0.0,
+            "p50_ms": percentile(intervals, 0.50) * 1000,
+            "p95_ms": percentile(intervals, 0.95) * 1000,
+            "p99_ms": percentile(intervals, 0.99) * 1000,
+            "dropped_frames": self.dropped_frames,
+            "total_frames": self.total_frames,
+            "phase_ms": {phase: seconds / count * 1000 for phase, seconds in phases.items()},
+        }
+
+    def export_csv(self, path):
+        phases = sorted({phase for _, frame_phases in self.frames for phase in frame_phases})
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["frame_ms"] + [f"{phase}_ms" for phase in phases])
+            for interval, frame_phases in self.frames:
+                writer.writerow([f"{interval * 1000:.4f}"] + [f"{frame_phases.get(phase, 0.0) * 1000:.4f}" for phase in phases])
+
+    def export_json(self, path):
+        with open(path, "w") as json_file:
+            json.dump({
+                "summary": self.summary(),
+                "frames": [
+                    {"frame_ms": interval * 1000, "phase_ms": {phase: seconds * 1000 for phase, seconds in frame_phases.items()}}
+                    for interval, frame_phases in self.frames
+                ],
+            }, json_file, indent=2)
+
+    def export(self, path):
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+
+
+PROFILER = FrameProfiler()
+
+
+# Input-to-present latency. Scenes call input() with the arrival time of each input the
+# coming frame shows and presented() once that frame is on screen.
+class LatencyMeter:
+    def __init__(self, history=3600):
+        self.enabled = False
+        self.frames = deque(maxlen=history)  # (frame, inputs shown, oldest input's latency, newest input's latency)
+        self.frame = 0
+        self._arrivals = []
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self._arrivals = []
+
+    def input(self, arrived):
+        if self.enabled:
+            self._arrivals.append(arrived)
+
+    def presented(self, now=None):
+        if not self.enabled:
+            return
+        self.frame += 1
+        if self._arrivals:
+            now = time.perf_counter() if now is None else now
+            self.frames.append((self.frame, len(self._arrivals), now - min(self._arrivals), now - max(self._arrivals)))
+            self._arrivals = []
+
+    def summary(self):
+        latencies = sorted(oldest for _, _, oldest, _ in self.frames)
+        return {
+            "frames": len(latencies),
+            "inputs": sum(count for _, count, _, _ in self.frames),
+            "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["frame", "inputs", "oldest_ms", "newest_ms"])
+            for frame, count, oldest, newest in self.frames:
+                writer.writerow([frame, count, f"{oldest * 1000:.4f}", f"{newest * 1000:.4f}"])
+
+
+LATENCY = LatencyMeter()
+
+
+# Process CPU time per second of wall-clock time, e.g. what an idle menu costs. Counts
+# every thread, not just the one calling sample().
+class CpuMeter:
+    WINDOW = 1.0  # Seconds each reading covers
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.frames = 0
+        self.per_second = None  # CPU seconds per second over the last full window
+        self.frames_per_second = None
+
+    def sample(self, drew=True):
+        # Call once per frame; returns True when a new reading is ready
+        self.frames += drew
+        now = time.perf_counter()
+        elapsed = now - self.started
+        if elapsed < self.WINDOW:
+            return False
+        cpu = time.process_time()
+        self.per_second = (cpu - self.cpu_started) / elapsed
+        self.frames_per_second = self.frames / elapsed
+        self.started, self.cpu_started, self.frames = now, cpu, 0
+        return True
@@ -0,0 +1,122 @@
+import math
+
+import pygame
+
+
+def merge_rects(rects):
+    # Union overlapping rectangles until none overlap, so no pixel is pushed twice
+    merged = [pygame.Rect(rect) for rect in rects if rect.width > 0 and rect.height > 0]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        while merged:
+            rect = merged.pop()
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                changed = True
+                index = rect.collidelist(merged)
+            result.append(rect)
+        merged = result
+    return merged
+
+
+# Only restores and pushes the regions that moving elements covered last frame and cover now
+class DirtyRenderer:
+    FULL_REDRAW_FRACTION = 0.4
+
+    def __init__(self, win, background):
+        self.win = win
+        self.background = background
+        self.screen_rect = win.get_rect()
+        self._previous = []
+        self._full_redraw = True
+        self.pixels_pushed = 0
+        self.total_pixels_pushed = 0
+        self.frames = 0
+        self.full_redraws = 0
+
+    def invalidate(self):
+        # Something was drawn outside the tracked elements; push the whole screen next frame
+        self._full_redraw = True
+
+    def restore(self):
+        if self._full_redraw:
+            self.win.blit(self.background, (0, 0))
+        else:
+            for rect in self._previous:
+                self.win.blit(self.background, rect, rect)
+
+    def present(self, rects, overlays=()):
+        # overlays draw straight onto the window after everything else and return the rect they covered
+        current = [self.screen_rect.clip(rect) for rect in rects if rect is not None]
+        dirty = merge_rects(self._previous + current)
+        area = sum(rect.width * rect.height for rect in dirty)
+
+        full = self._full_redraw or area > self.FULL_REDRAW_FRACTION * self.screen_rect.width * self.screen_rect.height
+        self._previous = current
+        self._full_redraw = False
+        if full:
+            self.push(None, overlays)
+            area = self.screen_rect.width * self.screen_rect.height
+            self.full_redraws += 1
+        else:
+            self.push(dirty, overlays)
+
+        self.pixels_pushed = area
+        self.total_pixels_pushed += area
+        self.frames += 1
+
+    def push(self, dirty, overlays):
+        # Shows the dirty regions, or the whole screen when dirty is None
+        covered = [overlay(self.win) for overlay in overlays]
+        if dirty is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty + covered)
+        # Overlays are restored next frame like anything else that moved
+        self._previous.extend(covered)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "full_redraws": self.full_redraws,
+            "pixels_pushed": self.pixels_pushed,
+            "average_pixels_pushed": self.total_pixels_pushed / self.frames if self.frames else 0,
+        }
+
+
+# Draws onto a reduced-resolution canvas and stretches only the changed regions onto the window
+class ScaledRenderer(DirtyRenderer):
+    def __init__(self, window, canvas, background):
+        super().__init__(canvas, background)
+        self.window = window
+        self.scale_x = window.get_width() / canvas.get_width()
+        self.scale_y = window.get_height() / canvas.get_height()
+
+    def push(self, dirty, overlays):
+        if dirty is None:
+            pygame.transform.scale(self.win, self.window.get_size(), self.window)
+            updated = []
+        else:
+            window_rect = self.window.get_rect()
+            updated = []
+            for rect in dirty:
+                left, top = int(rect.left * self.scale_x), int(rect.top * self.scale_y)
+                target = pygame.Rect(left, top, math.ceil(rect.right * self.scale_x) - left, math.ceil(rect.bottom * self.scale_y) - top)
+                target = target.clip(window_rect)
+                pygame.transform.scale(self.win.subsurface(rect), target.size, self.window.subsurface(target))
+                updated.append(target)
+
+        covered = [overlay(self.window) for overlay in overlays]
+        if dirty is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(updated + covered)
+        # Overlays are in window coordinates; restore and restretch the canvas under them next frame
+        self._previous.extend(
+            pygame.Rect(int(rect.left / self.scale_x), int(rect.top / self.scale_y),
+                        math.ceil(rect.width / self.scale_x) + 1, math.ceil(rect.height / self.scale_y) + 1).clip(self.screen_rect)
+            for rect in covered
+        )
@@ -0,0 +1,247 @@
+import bisect
+import json
+import struct
+import zlib
+
+from ai import make_ai
+from engine import (
+    MODE_VS_AI, MODE_VS_PLAYER, MODE_FOREHAND, MODE_BACKHAND, MODE_SERVE,
+    MatchState, DrillState, step, step_drill,
+)
+from timestep import TICK_RATE
+
+# Matches are recorded as the inputs of every tick plus occasional snapshots of the
+# whole state, then re-simulated on playback. The engine is deterministic, so this
+# reproduces the match exactly in a few kilobytes instead of a video.
+
+MAGIC = b"ACER"
+VERSION = 1
+KEYFRAME_INTERVAL = 30 * TICK_RATE  # Seeking never re-simulates more than 30 s of play
+
+MATCH_FIELDS = (
+    "tick", "left_score", "right_score", "serving", "power_level", "power_direction",
+    "holding_space", "power_building", "left_serve",
+    "left_player.x", "left_player.y", "right_player.x", "right_player.y",
+    "ball.x", "ball.y", "ball.x_vel", "ball.y_vel", "ball.last_collision_time",
+)
+DRILL_FIELDS = (
+    "tick", "score", "serving", "power_level", "power_direction", "holding_space", "power_building",
+    "player.x", "player.y",
+    "ball.x", "ball.y", "ball.x_vel", "ball.y_vel", "ball.last_collision_time",
+)
+AI_FIELDS = ("ai.plan_y_vel", "ai.plan_x_speed", "ai.target_x", "ai.ready_tick")
+INTEGER_FIELDS = {"tick", "left_score", "right_score", "score", "power_direction"}
+BOOLEAN_FIELDS = {"serving", "holding_space", "power_building", "left_serve"}
+
+MODES = {
+    MODE_VS_PLAYER: (MatchState, step, MATCH_FIELDS),
+    MODE_VS_AI: (MatchState, step, MATCH_FIELDS),
+    MODE_FOREHAND: (DrillState, step_drill, DRILL_FIELDS),
+    MODE_BACKHAND: (DrillState, step_drill, DRILL_FIELDS),
+    MODE_SERVE: (DrillState, step_drill, DRILL_FIELDS),
+}
+
+
+def new_state(mode, seed=None, ai_name=None):
+    state_type = MODES[mode][0]
+    if state_type is MatchState:
+        return MatchState(mode, seed, make_ai(ai_name) if ai_name else None)
+    return DrillState(mode)
+
+
+def keyframe_seed(seed, tick):
+    # The AI's RNG is reseeded at every keyframe so playback can start from any of them
+    return (seed * 1000003 + tick) & 0xFFFFFFFF
+
+
+# A state attribute by dotted path, such as "ball.x_vel"; shared with netplay
+def get_field(state, path):
+    obj = state
+    for name in path.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def set_field(state, path, value):
+    *parents, name = path.split(".")
+    obj = state
+    for parent in parents:
+        obj = getattr(obj, parent)
+    if name in INTEGER_FIELDS:
+        value = int(value)
+    elif name in BOOLEAN_FIELDS:
+        value = bool(value)
+    setattr(obj, name, value)
+
+
+def snapshot(state, fields):
+    return struct.pack(f"<{len(fields)}d", *(float(get_field(state, field)) for field in fields))
+
+
+def restore(state, fields, data, seed):
+    for field, value in zip(fields, struct.unpack(f"<{len(fields)}d", data)):
+        set_field(state, field, value)
+    if hasattr(state, "rng"):
+        state.rng.seed(keyframe_seed(seed, state.tick))
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class ReplayRecorder:
+    def __init__(self, state, seed=0, keyframe_interval=KEYFRAME_INTERVAL):
+        self.mode = state.mode
+        self.seed = seed
+        self.step_function = MODES[state.mode][1]
+        self.fields = MODES[state.mode][2]
+        # The predictive AI carries its plan between ticks, so it is part of every keyframe
+        self.ai_name = None
+        if getattr(state, "ai", None) is not None:
+            self.ai_name = state.ai.name
+            self.fields += AI_FIELDS
+        self.keyframe_interval = keyframe_interval
+        self.start_tick = state.tick
+        self.inputs = []
+        self.keyframes = []  # (tick, packed state)
+
+    def keyframe(self, state):
+        # Call after changing the state outside step(), so playback picks the change up
+        if self.keyframes and self.keyframes[-1][0] == state.tick:
+            self.keyframes.pop()
+        if hasattr(state, "rng"):
+            state.rng.seed(keyframe_seed(self.seed, state.tick))
+        self.keyframes.append((state.tick, snapshot(state, self.fields)))
+
+    def step(self, state, inputs):
+        # Drop-in replacement for the mode's step function that logs as it goes
+        if (state.tick - self.start_tick) % self.keyframe_interval == 0:
+            self.keyframe(state)
+        self.inputs.append(inputs)
+        self.step_function(state, inputs)
+
+    def to_bytes(self):
+        header = json.dumps({
+            "mode": self.mode,
+            "seed": self.seed,
+            "ai": self.ai_name,
+            "tick_rate": TICK_RATE,
+            "start_tick": self.start_tick,
+            "ticks": len(self.inputs),
+            "fields": list(self.fields),
+        }).encode()
+
+        body = bytearray()
+        _write_varint(body, len(self.keyframes))
+        for tick, data in self.keyframes:
+            _write_varint(body, tick)
+            body += data
+
+        # Inputs change rarely, so they are stored as (run length, bitmask) pairs
+        runs = []
+        for inputs in self.inputs:
+            if runs and runs[-1][1] == inputs:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, inputs])
+        _write_varint(body, len(runs))
+        for length, inputs in runs:
+            _write_varint(body, length)
+            _write_varint(body, inputs)
+
+        return MAGIC + struct.pack("<BH", VERSION, len(header)) + header + zlib.compress(bytes(body), 9)
+
+    def save(self, path):
+        with open(path, "wb") as replay_file:
+            replay_file.write(self.to_bytes())
+
+
+class ReplayPlayer:
+    def __init__(self, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        version, header_length = struct.unpack_from("<BH", data, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        header = json.loads(data[7:7 + header_length])
+        body = zlib.decompress(data[7 + header_length:])
+
+        self.mode = header["mode"]
+        self.seed = header["seed"]
+        self.ai_name = header.get("ai")
+        self.start_tick = header["start_tick"]
+        self.fields = tuple(header["fields"])
+        self.step_function = MODES[self.mode][1]
+        field_size = 8 * len(self.fields)
+
+        count, offset = _read_varint(body, 0)
+        self.keyframes = {}
+        for _ in range(count):
+            tick, offset = _read_varint(body, offset)
+            self.keyframes[tick] = body[offset:offset + field_size]
+            offset += field_size
+        self.keyframe_ticks = sorted(self.keyframes)
+
+        self.inputs = []
+        runs, offset = _read_varint(body, offset)
+        for _ in range(runs):
+            length, offset = _read_varint(body, offset)
+            inputs, offset = _read_varint(body, offset)
+            self.inputs.extend([inputs] * length)
+
+        self.state = None
+        self.seek(self.start_tick)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as replay_file:
+            return cls(replay_file.read())
+
+    @property
+    def tick(self):
+        return self.state.tick
+
+    @property
+    def end_tick(self):
+        return self.start_tick + len(self.inputs)
+
+    @property
+    def finished(self):
+        return self.state.tick >= self.end_tick
+
+    def seek(self, tick):
+        # Jump to the nearest keyframe at or before tick, then re-simulate the rest
+        tick = min(max(tick, self.start_tick), self.end_tick)
+        index = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        self.state = new_state(self.mode, self.seed, self.ai_name)
+        restore(self.state, self.fields, self.keyframes[self.keyframe_ticks[index]], self.seed)
+        self.advance(tick - self.state.tick)
+        return self.state
+
+    def advance(self, ticks=1):
+        state = self.state
+        for _ in range(ticks):
+            if state.tick >= self.end_tick:
+                break
+            data = self.keyframes.get(state.tick)
+            if data is not None:
+                restore(state, self.fields, data, self.seed)
+            self.step_function(state, self.inputs[state.tick - self.start_tick])
+        return state
+
+    def run_to_end(self):
+        return self.advance(self.end_tick - self.state.tick)
@@ -0,0 +1,182 @@
+import time
+
+import pygame
+
+from profiler import PROFILER
+
+# One window, one clock and one event pump for the whole app. Each mode is a scene on
+# a stack; only the top scene gets events and updates. Overlay scenes such as menus
+# are drawn on top of the last frame of the scene beneath them instead of replacing it.
+#
+# The frame cap sleeps inside pygame.event.wait, so every event is stamped with
+# perf_counter() in event.arrived as it comes in rather than when the next frame starts.
+# pygame 2 doesn't expose SDL's own event timestamps. A scene with nothing to show, such
+# as a menu nobody is touching, can say how long it may go without a frame, and the
+# loop stays asleep in there until an event comes.
+
+# Event types a scene can choose not to receive. Blocking every type with
+# set_blocked(None) walks SDL's whole event table and takes milliseconds, so only
+# these are switched; keyboard, quit and window events always get through.
+FILTERED_EVENTS = (
+    pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEWHEEL,
+    pygame.TEXTINPUT, pygame.TEXTEDITING, pygame.FINGERDOWN, pygame.FINGERUP, pygame.FINGERMOTION,
+    pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYHATMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP,
+    pygame.CONTROLLERAXISMOTION, pygame.CONTROLLERBUTTONDOWN, pygame.CONTROLLERBUTTONUP,
+)
+
+
+class Scene:
+    event_types = None  # Which of FILTERED_EVENTS the scene reads while on top; None lets them all through
+
+    def enter(self, manager):
+        # Called once when the scene is pushed; manager.window is the display surface
+        self.manager = manager
+
+    def exit(self):
+        # Called once when the scene leaves the stack; release anything it holds here
+        pass
+
+    def resume(self):
+        # Called when a scene pushed above this one is closed
+        pass
+
+    def idle_timeout(self):
+        # Seconds the scene can go without a frame while no events come; None keeps the frame rate
+        return None
+
+    def update(self, events, frame_time):
+        pass
+
+    def render(self, win):
+        pass
+
+
+class SceneManager:
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.window = None
+        self.stack = []
+        self.pending = []  # Stack changes requested during the frame, applied between frames
+        self.running = False
+        self.switch_time = 0.0  # Seconds the last batch of stack changes took
+        self.frame_start = 0.0  # When the current frame's work began, after the frame cap's sleep
+        self.frame_time = 0.0  # Seconds since the previous frame began
+        self.next_frame = 0.0
+        self.idle_wake = False  # The frame began because the top scene's idle timeout ran out
+        self.idled = False  # The last wait ran past the frame cap because the top scene allowed it
+        self.queued = []  # Stamped events not yet handed to a scene
+        self.after_render = []  # Called with the window after each frame is drawn, e.g. to capture it
+
+    @property
+    def top(self):
+        return self.stack[-1] if self.stack else None
+
+    def open(self, size, caption=None):
+        self.window = pygame.display.set_mode(size)
+        if caption:
+            pygame.display.set_caption(caption)
+        return self.window
+
+    def push(self, scene):
+        self.pending.append(("push", scene))
+
+    def pop(self, scene=None):
+        # Pops the top scene, or scene and everything above it
+        self.pending.append(("pop", scene))
+
+    def quit(self):
+        self.pending.append(("quit", None))
+
+    def _pop(self, scene=None):
+        while self.stack:
+            top = self.stack.pop()
+            top.exit()
+            if scene is None or top is scene:
+                break
+        if self.top is not None:
+            self.top.resume()
+
+    def apply_pending(self):
+        if not self.pending:
+            return
+        start = time.perf_counter()
+        pending, self.pending = self.pending, []
+        for action, scene in pending:
+            if action == "push":
+                self.stack.append(scene)
+                scene.enter(self)
+            elif action == "pop":
+                self._pop(scene)
+            else:
+                while self.stack:
+                    self.stack.pop().exit()
+        self.filter_events()
+        self.switch_time = time.perf_counter() - start
+
+    def filter_events(self):
+        # Ignored event types are dropped by SDL instead of queued and copied every frame
+        types = self.top.event_types if self.top is not None else None
+        pygame.event.set_allowed(FILTERED_EVENTS)
+        if types is not None:
+            pygame.event.set_blocked([event_type for event_type in FILTERED_EVENTS if event_type not in types])
+
+    def poll(self):
+        # Moves whatever is in SDL's queue into self.queued; returns the new events
+        now = time.perf_counter()
+        events = pygame.event.get()
+        for event in events:
+            event.arrived = now
+        self.queued.extend(events)
+        return events
+
+    def wait(self):
+        # Sleeps until the next frame is due, waking for each event so it can be stamped
+        self.poll()
+        timeout = self.top.idle_timeout() if self.top is not None else None
+        deadline = self.next_frame
+        if timeout is not None and not self.queued:
+            deadline = max(deadline, self.frame_start + timeout)
+        self.idled = deadline > self.next_frame
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining < 0.001:
+                break
+            event = pygame.event.wait(int(remaining * 1000))
+            if event.type != pygame.NOEVENT:
+                event.arrived = time.perf_counter()
+                self.queued.append(event)
+                self.poll()
+                deadline = self.next_frame  # Something to do, so back to the frame cap
+        self.idle_wake = timeout is not None and not self.queued
+
+        now = time.perf_counter()
+        self.frame_time = now - self.frame_start
+        self.frame_start = now
+        # A late frame starts the next one straight away rather than catching up
+        self.next_frame = max(self.next_frame + 1.0 / self.fps, now)
+
+    def run(self):
+        # Returns once the stack is empty or the window is closed
+        self.running = True
+        self.apply_pending()
+        self.frame_start = self.next_frame = time.perf_counter()
+        while self.running and self.stack:
+            PROFILER.begin_frame(self.idled)
+            self.wait()
+            PROFILER.mark("idle")
+
+            events, self.queued = self.queued, []
+            if any(event.type == pygame.QUIT for event in events):
+                self.quit()
+            else:
+                scene = self.top
+                scene.update(events, self.frame_time)
+                if scene is self.top and not self.pending:
+                    scene.render(self.window)
+                    for hook in self.after_render:
+                        hook(self.window)
+            self.apply_pending()
+
+        self.running = False
+        while self.stack:
+            self.stack.pop().exit()
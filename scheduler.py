@@ -0,0 +1,76 @@
+import heapq
+import itertools
+
+# Coroutines on game time. The owner calls advance() once per frame with the
+# game seconds that passed, so nothing ever sleeps, and anything scheduled stops counting
+# down while its owner isn't updated, e.g. while a match sits under the pause menu.
+#
+# A coroutine is a generator; each value it yields is the number of game seconds to wait
+# before it carries on, None meaning the next advance().
+
+EPSILON = 1e-9  # Sixty ticks of 1/60 s add up to a hair under a second; that still counts as due
+
+
+class Task:
+    def __init__(self, due, callback):
+        self.due = due
+        self.callback = callback
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def active(self):
+        return not (self.cancelled or self.done)
+
+
+class Scheduler:
+    def __init__(self):
+        self.time = 0.0  # Game seconds advanced so far
+        self.queue = []  # (due, order, task) heap
+        self.order = itertools.count()  # Keeps tasks due together in the order they were scheduled
+
+    def schedule(self, task):
+        heapq.heappush(self.queue, (task.due, next(self.order), task))
+        return task
+
+    def start(self, coroutine):
+        # Runs the generator up to its first yield now; the returned task cancels the rest
+        task = Task(self.time, None)
+        task.callback = lambda: self.resume(task, coroutine)
+        self.resume(task, coroutine)
+        return task
+
+    def resume(self, task, coroutine):
+        try:
+            delay = next(coroutine)
+        except StopIteration:
+            task.done = True
+            return
+        task.due = self.time + (delay or 0.0)
+        task.done = False
+        self.schedule(task)
+
+    def advance(self, seconds):
+        # Runs everything due by the new time, each at most once; anything rescheduled
+        # for a time already passed runs on the next advance
+        self.time += seconds
+        due = []
+        while self.queue and self.queue[0][0] <= self.time + EPSILON:
+            due.append(heapq.heappop(self.queue)[2])
+        for task in due:
+            if task.cancelled:
+                continue
+            task.done = True
+            task.callback()
+
+    def cancel_all(self):
+        for _, _, task in self.queue:
+            task.cancelled = True
+        self.queue.clear()
+
+    def __len__(self):
+        return sum(1 for _, _, task in self.queue if not task.cancelled)
+
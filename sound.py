@@ -0,0 +1,128 @@
+import math
+import random
+from array import array
+from contextlib import contextmanager
+
+import pygame
+
+# Sound effects. Every effect is synthesised into a pygame.mixer.Sound once at startup,
+# so playing one during a match is just handing a buffer to a free channel. The game
+# rules call play() from the collision and scoring code; until load() succeeds they
+# only pay for checking SOUNDS.enabled, which keeps headless simulation silent.
+
+FREQUENCY = 22050  # Plenty for short effects, and half the samples to synthesise at startup
+MIXER_BUFFER = 128  # Samples per mixer chunk; about 6 ms, so sounds start with the hit
+CHANNELS = 8  # Voices; when all are busy the one that started longest ago is cut off
+
+SOUND_HIT = "hit"
+SOUND_BOUNCE = "bounce"
+SOUND_SERVE = "serve"
+SOUND_POINT = "point"
+
+VOLUMES = {1: 0.25, 2: 0.6, 3: 1.0}  # The Options menu's Low, Medium and High
+
+
+def tone(frequency, duration, decay, end_frequency=None, noise=0.0, rng=None):
+    # A decaying sine, optionally sliding to end_frequency and mixed with some noise
+    end_frequency = end_frequency or frequency
+    rng = rng or random.Random(0)
+    count = int(FREQUENCY * duration)
+    step = 2 * math.pi / FREQUENCY
+    slide = (end_frequency - frequency) / count
+    fade = math.exp(-decay / count)  # Per-sample factor of the exponential decay
+    samples = []
+    phase = 0.0
+    envelope = 1.0
+    for index in range(count):
+        phase += step * (frequency + slide * index)
+        value = (1 - noise) * math.sin(phase) + noise * (2 * rng.random() - 1)
+        samples.append(value * envelope * min(1.0, index / 64))  # Short attack so it doesn't click
+        envelope *= fade
+    return samples
+
+
+def chime(*notes):
+    # (frequency, duration) notes one after another
+    samples = []
+    for frequency, duration in notes:
+        samples += tone(frequency, duration, decay=4)
+    return samples
+
+
+EFFECTS = {
+    SOUND_HIT: lambda: tone(520, 0.09, decay=9, end_frequency=380, noise=0.35),
+    SOUND_BOUNCE: lambda: tone(240, 0.06, decay=10, noise=0.2),
+    SOUND_SERVE: lambda: tone(300, 0.14, decay=5, end_frequency=650, noise=0.15),
+    SOUND_POINT: lambda: chime((660, 0.12), (880, 0.22)),
+}
+
+
+class SoundBank:
+    def __init__(self, effects=EFFECTS, channels=CHANNELS):
+        self.effects = effects
+        self.channel_count = channels
+        self.enabled = False
+        self.sounds = {}
+        self.channels = []
+        self.started = []  # When each channel's current sound started, in plays
+        self.plays = 0
+        self.stolen = 0
+        self.volume = VOLUMES[2]
+
+    def pre_init(self, buffer=MIXER_BUFFER):
+        # Must come before pygame.init(), which opens the mixer with these settings
+        pygame.mixer.pre_init(FREQUENCY, -16, 2, buffer)
+
+    def load(self):
+        # Decodes every effect; leaves the bank disabled if there is no audio device
+        settings = pygame.mixer.get_init()
+        if settings is None or settings[1] != -16:
+            return False
+        _, _, channels = settings
+        for name, build in self.effects.items():
+            mono = array("h", [int(sample * 0.8 * 32767) for sample in build()])
+            samples = array("h", bytes(len(mono) * channels * 2))
+            for channel in range(channels):
+                samples[channel::channels] = mono
+            self.sounds[name] = pygame.mixer.Sound(buffer=samples)
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), self.channel_count))
+        pygame.mixer.set_reserved(self.channel_count)  # Keep find_channel() and Sound.play() off the pool
+        self.channels = [pygame.mixer.Channel(index) for index in range(self.channel_count)]
+        self.started = [0] * self.channel_count
+        self.set_volume(self.volume)
+        self.enabled = True
+        return True
+
+    def set_volume(self, volume):
+        # Applies to sounds already playing too; nothing is reloaded
+        self.volume = volume
+        for channel in self.channels:
+            channel.set_volume(volume)
+
+    def play(self, name):
+        if not self.enabled:
+            return
+        self.plays += 1
+        index = next((index for index, channel in enumerate(self.channels) if not channel.get_busy()), None)
+        if index is None:
+            index = self.started.index(min(self.started))
+            self.stolen += 1
+        self.started[index] = self.plays
+        channel = self.channels[index]
+        channel.play(self.sounds[name])
+        channel.set_volume(self.volume)
+
+    @contextmanager
+    def muted(self):
+        # For replaying many ticks at once, e.g. seeking a replay
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+    def stats(self):
+        return {"plays": self.plays, "stolen": self.stolen}
+
+
+SOUNDS = SoundBank()
@@ -0,0 +1,273 @@
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from engine import MODE_BACKHAND, MODE_FOREHAND, MODE_SERVE, MODE_VS_AI, MODE_VS_PLAYER
+from timestep import TICK_RATE
+
+# Per-player session statistics in a local SQLite database. The game thread only ever
+# puts work on a queue; one background thread owns the connection, writes whatever has
+# queued up in a single transaction and answers queries through futures, so nothing in
+# the frame loop waits on the disk. Even the sqlite3 module is only loaded by that thread.
+
+STATS_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "ace_academy", "stats.sqlite3")
+BATCH_SIZE = 64  # Most queued items written in one transaction
+BATCH_DELAY = 0.5  # Seconds the writer waits for more work before committing what it has
+DEFAULT_PLAYER = "Player"
+MODES = (MODE_VS_AI, MODE_VS_PLAYER, MODE_FOREHAND, MODE_BACKHAND, MODE_SERVE)
+DRILL_MODES = (MODE_FOREHAND, MODE_BACKHAND, MODE_SERVE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    mode TEXT NOT NULL,
+    opponent TEXT,
+    started REAL NOT NULL,
+    seconds REAL NOT NULL,
+    completed INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    opponent_score INTEGER,
+    won INTEGER,
+    hits INTEGER NOT NULL,
+    contacts INTEGER,
+    serves INTEGER NOT NULL,
+    mean_serve_power REAL,
+    best_serve_power REAL
+);
+CREATE TABLE IF NOT EXISTS serves (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    number INTEGER NOT NULL,
+    power REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_mode ON sessions(mode, player_id, score);
+CREATE INDEX IF NOT EXISTS sessions_by_player ON sessions(player_id, mode, started);
+CREATE INDEX IF NOT EXISTS serves_by_session ON serves(session_id);
+"""
+
+
+# Wraps a step function like ReplayRecorder does and keeps one player's totals. The
+# player is the left paddle in matches and the only one in drills.
+class SessionTracker:
+    def __init__(self, player, state, step_function, opponent=None):
+        self.player = player or DEFAULT_PLAYER
+        self.state = state
+        self.step_function = step_function
+        self.opponent = opponent
+        self.started = time.time()
+        self.ticks = 0
+        self.hits = 0  # Scoring drill hits, or returns off the player's paddle in a match
+        self.contacts = 0  # Every touch of the paddle in a drill
+        self.serve_powers = []
+
+    def step(self, state, inputs):
+        serving = state.serving
+        power = state.power_level
+        drill = state.mode in DRILL_MODES
+        # In VS Player the point's winner serves next; the right paddle's serves aren't this player's
+        own_serve = drill or state.left_serve or state.mode == MODE_VS_AI
+        if drill:
+            score = state.score
+            last_hit = state.ball.last_collision_time
+        else:
+            y_vel = state.ball.y_vel
+
+        self.step_function(state, inputs)
+        self.ticks += 1
+
+        if serving and not state.serving and own_serve:
+            self.serve_powers.append(power)
+        if drill:
+            self.hits += max(state.score - score, 0)  # Finishing a round resets the score outside step()
+            if state.ball.last_collision_time != last_hit:
+                self.contacts += 1
+        elif not serving and not state.serving and y_vel < 0 < state.ball.y_vel:
+            self.hits += 1  # The left paddle sent the ball back down
+
+    def session(self):
+        state = self.state
+        powers = self.serve_powers
+        row = {
+            "mode": state.mode,
+            "opponent": self.opponent,
+            "started": self.started,
+            "seconds": self.ticks / TICK_RATE,
+            "completed": int(state.mode in DRILL_MODES or state.finished),
+            "hits": self.hits,
+            "serves": len(powers),
+            "mean_serve_power": sum(powers) / len(powers) if powers else None,
+            "best_serve_power": max(powers) if powers else None,
+        }
+        if state.mode in DRILL_MODES:
+            row.update(score=self.hits, opponent_score=None, won=None,
+                       contacts=self.contacts if state.mode != MODE_SERVE else None)
+        else:
+            row.update(score=state.left_score, opponent_score=state.right_score,
+                       won=int(state.winner == "left") if state.finished else None, contacts=None)
+        return row
+
+
+class StatsStore:
+    def __init__(self):
+        self.path = None
+        self.queue = queue.Queue()
+        self.thread = None
+        self.written = 0  # Sessions committed so far
+        self.batches = 0  # Transactions committed so far
+
+    @property
+    def enabled(self):
+        return self.thread is not None
+
+    def open(self, path=STATS_PATH):
+        # Starts the writer thread; the database itself is opened on that thread
+        if self.thread is not None:
+            return
+        self.path = path
+        self.thread = threading.Thread(target=self._run, name="stats-writer", daemon=True)
+        self.thread.start()
+
+    def close(self, timeout=5.0):
+        # Writes anything still queued and stops the thread
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout)
+        self.thread = None
+
+    def record_session(self, player, session, serve_powers=()):
+        if self.thread is not None:
+            self.queue.put(("session", player, session, list(serve_powers)))
+
+    def query(self, function, *args):
+        # Runs function(connection, *args) on the writer thread, after everything queued before it
+        future = Future()
+        if self.thread is None:
+            future.set_exception(RuntimeError("stats are not enabled"))
+        else:
+            self.queue.put(("query", function, args, future))
+        return future
+
+    def leaderboard(self, mode, limit=5):
+        return self.query(leaderboard, mode, limit)
+
+    def progress(self, player, mode, limit=10):
+        return self.query(progress, player, mode, limit)
+
+    def _connect(self):
+        import sqlite3
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _run(self):
+        import sqlite3  # On this thread, so loading it doesn't hold up the first menu frame
+
+        try:
+            connection = self._connect()
+        except (OSError, sqlite3.Error) as error:
+            print(f"stats disabled: {error}", file=sys.stderr)
+            connection = None
+
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + BATCH_DELAY
+            # Keep gathering writes, but don't hold up a query or shutdown
+            while batch[-1] is not None and batch[-1][0] != "query" and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            sessions = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif item[0] == "session":
+                    sessions.append(item[1:])
+                else:
+                    # Queries see every session queued before them
+                    self._write(connection, sessions)
+                    sessions = []
+                    self._answer(connection, *item[1:])
+            self._write(connection, sessions)
+
+        if connection is not None:
+            connection.close()
+
+    def _write(self, connection, sessions):
+        if not sessions or connection is None:
+            return
+        try:
+            with connection:
+                for player, session, serve_powers in sessions:
+                    insert_session(connection, player, session, serve_powers)
+            self.written += len(sessions)
+            self.batches += 1
+        except Exception as error:  # Anything escaping here would end the writer thread
+            print(f"stats not saved: {error!r}", file=sys.stderr)
+
+    def _answer(self, connection, function, args, future):
+        if not future.set_running_or_notify_cancel():
+            return  # Cancelled while queued
+        if connection is None:
+            future.set_exception(RuntimeError("stats database unavailable"))
+            return
+        try:
+            result = function(connection, *args)
+        except Exception as error:  # The caller gets it, whatever it is, and the writer carries on
+            future.set_exception(error)
+            return
+        future.set_result(result)
+
+
+def player_id(connection, name):
+    connection.execute("INSERT OR IGNORE INTO players (name) VALUES (?)", (name,))
+    return connection.execute("SELECT id FROM players WHERE name = ?", (name,)).fetchone()[0]
+
+
+def insert_session(connection, player, session, serve_powers):
+    columns = sorted(session)
+    cursor = connection.execute(
+        f"INSERT INTO sessions (player_id, {', '.join(columns)}) VALUES (?{', ?' * len(columns)})",
+        [player_id(connection, player)] + [session[column] for column in columns],
+    )
+    connection.executemany("INSERT INTO serves (session_id, number, power) VALUES (?, ?, ?)",
+                           [(cursor.lastrowid, number, power) for number, power in enumerate(serve_powers)])
+
+
+def leaderboard(connection, mode, limit=5):
+    # Each player's best score in mode, best first; uses sessions_by_mode
+    return connection.execute(
+        """SELECT players.name, best, played, wins FROM (
+               SELECT player_id, MAX(score) AS best, COUNT(*) AS played, SUM(won) AS wins
+               FROM sessions WHERE mode = ? GROUP BY player_id
+           ) JOIN players ON players.id = player_id
+           ORDER BY best DESC, wins DESC LIMIT ?""",
+        (mode, limit),
+    ).fetchall()
+
+
+def progress(connection, player, mode, limit=10):
+    # A player's latest sessions in mode, oldest first; uses sessions_by_player
+    rows = connection.execute(
+        """SELECT started, score, opponent_score, hits, contacts, mean_serve_power FROM sessions
+           WHERE player_id = (SELECT id FROM players WHERE name = ?) AND mode = ?
+           ORDER BY started DESC LIMIT ?""",
+        (player, mode, limit),
+    ).fetchall()
+    return rows[::-1]
+
+
+STATS = StatsStore()
@@ -0,0 +1,122 @@
+import math
+
+# Continuous collision for the ball. Instead of testing where the ball ends up after a
+# tick, the segment it travels along is swept against the walls and paddle zones, so a
+# fast ball can't skip over a 20 px paddle. Work per tick is bounded by MAX_IMPACTS,
+# however fast the ball is moving.
+
+MAX_IMPACTS = 4
+KIND_WALL = "wall"
+KIND_PADDLE = "paddle"
+
+
+class Impact:
+    def __init__(self, time, x, y, kind, target=None):
+        self.time = time  # Fraction of the tick at which the ball made contact
+        self.x = x
+        self.y = y
+        self.kind = kind
+        self.target = target
+
+
+# Box the ball centre may not enter. direction limits which way the ball has to be
+# travelling vertically for the zone to count (-1 up, 1 down, 0 either).
+class Zone:
+    def __init__(self, left, top, right, bottom, direction=0, target=None):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.direction = direction
+        self.target = target
+
+
+def time_to_bounds(position, velocity, low, high):
+    # Time until position reaches low or high while travelling at velocity; 0 if already past
+    if velocity > 0:
+        return max((high - position) / velocity, 0.0)
+    if velocity < 0:
+        return max((low - position) / velocity, 0.0)
+    return math.inf
+
+
+def segment_zone_entry(x, y, x_vel, y_vel, zone, limit):
+    # Slab test of the segment (x, y) + t * (x_vel, y_vel), 0 <= t <= limit, against zone
+    if zone.direction and (y_vel > 0) != (zone.direction > 0):
+        return None
+
+    enter, leave = 0.0, limit
+    for position, velocity, low, high in ((x, x_vel, zone.left, zone.right), (y, y_vel, zone.top, zone.bottom)):
+        if velocity == 0:
+            if position < low or position > high:
+                return None
+            continue
+        t1 = (low - position) / velocity
+        t2 = (high - position) / velocity
+        if t1 > t2:
+            t1, t2 = t2, t1
+        enter = max(enter, t1)
+        leave = min(leave, t2)
+        if enter > leave:
+            return None
+    return enter
+
+
+def sweep(body, zones, width, height, radius, on_paddle, vertical_walls=False, max_impacts=MAX_IMPACTS):
+    # Moves body (anything with x, y, x_vel and y_vel) through one tick, bouncing off
+    # the side walls (and the top and bottom when vertical_walls is set) and calling
+    # on_paddle(body, impact) for each zone it reaches. Returns the impacts in order.
+    impacts = []
+    elapsed = 0.0
+    remaining = 1.0
+    excluded = None  # A zone is not hit twice in a row within one tick
+
+    while remaining > 0 and len(impacts) < max_impacts:
+        time, kind, hit_zone = remaining, None, None
+
+        wall_time = time_to_bounds(body.x, body.x_vel, radius, width - radius)
+        if wall_time <= time:
+            time, kind = wall_time, "x"
+        if vertical_walls:
+            wall_time = time_to_bounds(body.y, body.y_vel, radius, height - radius)
+            if wall_time < time:
+                time, kind = wall_time, "y"
+
+        for zone in zones:
+            if zone is excluded:
+                continue
+            entry = segment_zone_entry(body.x, body.y, body.x_vel, body.y_vel, zone, time)
+            if entry is not None and (entry < time or kind is None):
+                time, kind, hit_zone = entry, KIND_PADDLE, zone
+
+        if kind is None:
+            break
+
+        body.x += body.x_vel * time
+        body.y += body.y_vel * time
+        elapsed += time
+        remaining -= time
+
+        if kind == KIND_PADDLE:
+            impact = Impact(elapsed, body.x, body.y, KIND_PADDLE, hit_zone.target)
+            on_paddle(body, impact)
+            excluded = hit_zone
+        else:
+            if kind == "x":
+                body.x = min(max(body.x, radius), width - radius)
+                body.x_vel *= -1
+            else:
+                body.y = min(max(body.y, radius), height - radius)
+                body.y_vel *= -1
+            impact = Impact(elapsed, body.x, body.y, KIND_WALL)
+            excluded = None
+        impacts.append(impact)
+
+    body.x += body.x_vel * remaining
+    body.y += body.y_vel * remaining
+    if len(impacts) >= max_impacts:
+        # Out of impacts for this tick; keep the ball on the court until the next one
+        body.x = min(max(body.x, radius), width - radius)
+        if vertical_walls:
+            body.y = min(max(body.y, radius), height - radius)
+    return impacts
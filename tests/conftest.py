@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The game's modules sit at the top of the repository, and nothing here needs a real display or sound card
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,44 @@
+import random
+
+from batch_sim import RallyBatch, batch_collision
+from engine import WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, BALL_RADIUS, Player, Ball, handle_collision
+
+
+def collision_test_set(count, seed=0):
+    # Random ball/paddle layouts concentrated around the walls and paddles, where the rules branch
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(count):
+        left_x = rng.randint(0, WIDTH - PLAYER_WIDTH)
+        right_x = rng.randint(0, WIDTH - PLAYER_WIDTH)
+        left_y = rng.randint(0, HEIGHT // 2 - PLAYER_HEIGHT)
+        right_y = rng.randint(HEIGHT // 2, HEIGHT - PLAYER_HEIGHT)
+        paddle_x, paddle_y = rng.choice(((left_x, left_y), (right_x, right_y)))
+        ball_x = rng.choice((
+            rng.randint(-20, WIDTH + 20),
+            rng.randint(paddle_x - 20, paddle_x + PLAYER_WIDTH + 20),
+        ))
+        ball_y = rng.randint(paddle_y - 30, paddle_y + PLAYER_HEIGHT + 30)
+        x_vel = rng.choice((0, rng.randint(-8, 8), rng.uniform(-8, 8)))
+        y_vel = rng.choice((Ball.MAX_VEL, -Ball.MAX_VEL, rng.uniform(-27, 27)))
+        cases.append((ball_x, ball_y, x_vel, y_vel, left_x, left_y, right_x, right_y))
+    return cases
+
+
+def test_batch_collision_matches_handle_collision():
+    cases = collision_test_set(20000)
+    batch = RallyBatch(len(cases))
+    for field, column in zip(RallyBatch.FIELDS, zip(*cases)):
+        getattr(batch, field)[:] = column
+    batch_collision(batch)
+
+    mismatches = []
+    for index, (ball_x, ball_y, x_vel, y_vel, left_x, left_y, right_x, right_y) in enumerate(cases):
+        ball = Ball(ball_x, ball_y, BALL_RADIUS)
+        ball.x_vel, ball.y_vel = x_vel, y_vel
+        handle_collision(ball, Player(left_x, left_y, PLAYER_WIDTH, PLAYER_HEIGHT),
+                         Player(right_x, right_y, PLAYER_WIDTH, PLAYER_HEIGHT))
+        actual = (batch.ball_x[index], batch.ball_y[index], batch.ball_x_vel[index], batch.ball_y_vel[index])
+        if (ball.x, ball.y, ball.x_vel, ball.y_vel) != actual:
+            mismatches.append(index)
+    assert not mismatches, f"{len(mismatches)} of {len(cases)} layouts differ, first {cases[mismatches[0]]}"
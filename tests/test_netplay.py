@@ -0,0 +1,37 @@
+import time
+
+from netplay import SNAPSHOT_HISTORY, Link, NetClient, NetHost
+
+
+def play_over_link(ticks, loss=0.0, jitter=0.0, latency=0.0, tick_time=0.0, seed=0):
+    # A host and a client over loopback; returns both and the most snapshots either side held at once
+    host = NetHost(Link(("127.0.0.1", 0), latency=latency, jitter=jitter, loss=loss, seed=seed))
+    client = NetClient(Link(("127.0.0.1", 0), latency=latency, jitter=jitter, loss=loss, seed=seed + 1),
+                       host.link.address)
+    most = 0
+    try:
+        for _ in range(ticks):
+            client.step(client.state, 0)
+            host.step(host.state, 0)
+            most = max(most, len(host.history), len(client.history))
+            if tick_time:
+                time.sleep(tick_time)
+    finally:
+        host.link.close()
+        client.link.close()
+    return host, client, most
+
+
+def test_snapshot_history_stays_bounded_over_a_lossy_link():
+    # Lost and reordered snapshots mustn't let either side's delta-base history grow
+    _, client, most = play_over_link(2000, loss=0.1, jitter=0.004)
+    assert client.connected
+    assert most <= SNAPSHOT_HISTORY
+
+
+def test_both_sides_measure_round_trip_time():
+    # 20 ms each way, plus up to a tick on each side before a delayed packet is polled
+    host, client, _ = play_over_link(90, latency=0.02, tick_time=1 / 60)
+    for side in (host, client):
+        rtt = side.link.stats.summary()["rtt_ms"]
+        assert 35 < rtt < 120, rtt
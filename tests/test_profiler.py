@@ -0,0 +1,15 @@
+import time
+
+from profiler import FrameProfiler
+
+
+def test_deliberate_idle_frames_are_not_dropped():
+    profiler = FrameProfiler(target_fps=60)
+    profiler.enable()
+    profiler.begin_frame()
+    time.sleep(0.05)
+    profiler.begin_frame(idled=True)
+    assert (profiler.total_frames, profiler.dropped_frames) == (1, 0)
+    time.sleep(0.05)
+    profiler.begin_frame()
+    assert (profiler.total_frames, profiler.dropped_frames) == (2, 1)
@@ -0,0 +1,66 @@
+from scheduler import Scheduler
+
+TICK = 1 / 60
+
+
+def waits(scheduler, resumed, seconds):
+    resumed.append(("start", scheduler.time))
+    yield seconds
+    resumed.append(("after", scheduler.time))
+    yield None
+    resumed.append(("next", scheduler.time))
+
+
+def test_start_runs_to_the_first_yield():
+    scheduler, resumed = Scheduler(), []
+    scheduler.start(waits(scheduler, resumed, 0.5))
+    assert resumed == [("start", 0.0)]
+
+
+def test_wait_takes_exactly_its_ticks():
+    # Thirty ticks of 1/60 s add up to a hair under half a second
+    scheduler, resumed = Scheduler(), []
+    scheduler.start(waits(scheduler, resumed, 0.5))
+    ticks = 0
+    while len(resumed) < 2:
+        scheduler.advance(TICK)
+        ticks += 1
+    assert ticks == 30
+
+
+def test_yield_none_resumes_on_the_next_advance():
+    scheduler, resumed = Scheduler(), []
+    task = scheduler.start(waits(scheduler, resumed, 0.0))
+    scheduler.advance(TICK)
+    assert len(resumed) == 2
+    scheduler.advance(TICK)
+    assert len(resumed) == 3
+    assert task.done and not task.active
+    assert len(scheduler) == 0
+
+
+def test_no_progress_while_paused():
+    scheduler, resumed = Scheduler(), []
+    scheduler.start(waits(scheduler, resumed, 0.1))
+    for _ in range(100):
+        scheduler.advance(0.0)
+    assert len(resumed) == 1
+
+
+def test_cancel_stops_a_coroutine():
+    scheduler, resumed = Scheduler(), []
+    task = scheduler.start(waits(scheduler, resumed, 0.1))
+    task.cancel()
+    scheduler.advance(1.0)
+    assert len(resumed) == 1
+    assert not task.active
+
+
+def test_cancel_all_empties_the_queue():
+    scheduler, resumed = Scheduler(), []
+    scheduler.start(waits(scheduler, resumed, 0.1))
+    scheduler.start(waits(scheduler, resumed, 0.2))
+    scheduler.cancel_all()
+    scheduler.advance(1.0)
+    assert len(resumed) == 2
+    assert len(scheduler) == 0
@@ -0,0 +1,26 @@
+from engine import (
+    INPUT_LEFT_PLAYER_LEFT, INPUT_RIGHT_PLAYER_LEFT, INPUT_SERVE_PRESS, INPUT_SERVE_RELEASE, MODE_VS_PLAYER,
+    MatchState, step,
+)
+from stats import SessionTracker
+
+
+def test_match_records_only_the_left_players_serves():
+    # Each side in turn steps away from the serve, so both paddles win points and serve
+    state = MatchState(MODE_VS_PLAYER, 1)
+    tracker = SessionTracker("left", state, step)
+    left_serves = 0
+    while not state.finished and state.tick < 100000:
+        if state.serving:
+            inputs = INPUT_SERVE_RELEASE if state.holding_space else INPUT_SERVE_PRESS
+            if inputs == INPUT_SERVE_RELEASE and state.left_serve:
+                left_serves += 1
+        elif (state.left_score + state.right_score) % 2:
+            inputs = INPUT_LEFT_PLAYER_LEFT
+        else:
+            inputs = INPUT_RIGHT_PLAYER_LEFT
+        tracker.step(state, inputs)
+    assert state.finished
+    assert 0 < left_serves < state.left_score + state.right_score
+    assert len(tracker.serve_powers) == left_serves
+    assert tracker.session()["serves"] == left_serves
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import pygame
+
+# Font rasterisation is slow compared to a blit, and the game keeps drawing the same
+# few strings, so rendered text is kept in a bounded least-recently-used cache.
+
+
+def _prepare(surface):
+    # Match the display format when there is one, so blits don't convert every frame
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        return surface.convert_alpha()
+    return surface
+
+
+# Pre-rendered glyphs for drawing numbers without touching the font
+class DigitAtlas:
+    CHARACTERS = "0123456789-"
+
+    def __init__(self, font, color, antialias=True):
+        self.glyphs = {char: _prepare(font.render(char, antialias, color)) for char in self.CHARACTERS}
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def size(self, number):
+        return sum(self.glyphs[char].get_width() for char in str(number)), self.height
+
+    def draw(self, win, number, pos):
+        x, y = pos
+        rect = pygame.Rect(x, y, 0, self.height)
+        for char in str(number):
+            glyph = self.glyphs[char]
+            win.blit(glyph, (x, y))
+            x += glyph.get_width()
+        rect.width = x - rect.x
+        return rect
+
+
+class TextCache:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._atlases = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), bool(antialias))
+        surface = self._entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = _prepare(font.render(text, antialias, color))
+        self._entries[key] = surface
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def digits(self, font, color, antialias=True):
+        key = (font, tuple(color), bool(antialias))
+        atlas = self._atlases.get(key)
+        if atlas is not None:
+            self.hits += 1
+            return atlas
+
+        self.misses += 1
+        atlas = DigitAtlas(font, color, antialias)
+        self._atlases[key] = atlas
+        return atlas
+
+    def clear(self):
+        # Cached surfaces are converted for one display mode; drop them when it changes
+        self._entries.clear()
+        self._atlases.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "atlases": len(self._atlases),
+        }
+
+
+TEXT_CACHE = TextCache()
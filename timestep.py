@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+# Game speeds in engine.py are per tick, and ticks always happen TICK_RATE times a
+# second of game time, whatever rate the screen is drawn at.
+TICK_RATE = 60
+MAX_FRAME_TIME = 0.25  # Longer stalls are dropped instead of replayed all at once
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate=TICK_RATE, max_frame_time=MAX_FRAME_TIME):
+        self.tick_time = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.ticks = 0
+
+    def advance(self, frame_time):
+        # Returns how many ticks to run for frame_time seconds of real time
+        self.accumulator += min(frame_time, self.max_frame_time)
+        ticks = int(self.accumulator / self.tick_time)
+        self.accumulator -= ticks * self.tick_time
+        self.ticks += ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        # How far the current frame is between the last two ticks
+        return self.accumulator / self.tick_time
+
+    def reset(self):
+        self.accumulator = 0.0
+
+
+# Remembers where objects were before the latest tick so frames can be drawn between ticks
+class Interpolator:
+    SNAP_DISTANCE = 100  # Jumps this big are resets, not motion, and are not smoothed
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.save()
+
+    def save(self):
+        self.previous = [(obj.x, obj.y) for obj in self.objects]
+
+    @contextmanager
+    def at(self, alpha):
+        # Temporarily moves the objects to their interpolated positions, e.g. while drawing
+        current = [(obj.x, obj.y) for obj in self.objects]
+        for obj, (old_x, old_y), (new_x, new_y) in zip(self.objects, self.previous, current):
+            if abs(new_x - old_x) < self.SNAP_DISTANCE and abs(new_y - old_y) < self.SNAP_DISTANCE:
+                obj.x = old_x + (new_x - old_x) * alpha
+                obj.y = old_y + (new_y - old_y) * alpha
+        try:
+            yield
+        finally:
+            for obj, (x, y) in zip(self.objects, current):
+                obj.x = x
+                obj.y = y
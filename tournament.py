@@ -0,0 +1,316 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, deque
+
+from engine import (
+    POWER_MAX, AI_VEL, AI_JITTER, MODE_VS_PLAYER, INPUT_SERVE_PRESS, INPUT_SERVE_RELEASE,
+    MatchState, award_point, handle_ai_movement, step,
+)
+from profiler import percentile
+from timestep import TICK_RATE
+
+# Self-play between parameterised versions of handle_ai_movement. Every match is an
+# independent job with its own seed, so they are spread over a process pool and the
+# results streamed back as they finish; the same seed always gives the same results
+# however many processes play them.
+
+ELO_START = 1500
+ELO_K = 16
+MAX_MATCH_TICKS = 10 * 60 * TICK_RATE  # Matches still going after 10 minutes of game time are draws
+MAX_RALLY_TICKS = 60 * TICK_RATE  # Two AIs that can both reach every ball rally forever; replay the point
+RALLY_BUCKETS = (60, 120, 300, 600, 1200)  # Rally length histogram edges, in ticks
+
+
+class AiConfig:
+    PARAMETERS = {"vel": int, "jitter": int, "reaction": int, "power": float}
+
+    def __init__(self, name, vel=AI_VEL, jitter=AI_JITTER, reaction=0, power=POWER_MAX / 2):
+        self.name = name
+        self.vel = vel  # Pixels per tick, handle_ai_movement's AI_VEL
+        self.jitter = jitter  # handle_ai_movement's AI_JITTER
+        self.reaction = reaction  # The paddle chases where the ball was this many ticks ago
+        self.power = power  # Serve power the AI releases the meter at
+
+    @classmethod
+    def parse(cls, spec):
+        # "name:vel=3,jitter=10" or just "vel=3,jitter=10"
+        name, _, settings = spec.rpartition(":")
+        values = {}
+        for setting in filter(None, settings.split(",")):
+            key, _, value = setting.partition("=")
+            values[key] = cls.convert(key, value)
+        return cls(name or settings, **values)
+
+    @classmethod
+    def convert(cls, key, value):
+        if key not in cls.PARAMETERS:
+            raise ValueError(f"unknown AI parameter {key!r}")
+        try:
+            return cls.PARAMETERS[key](value)
+        except ValueError:
+            raise ValueError(f"bad value {value!r} for AI parameter {key!r}") from None
+
+    def to_dict(self):
+        return {"name": self.name, "vel": self.vel, "jitter": self.jitter, "reaction": self.reaction, "power": self.power}
+
+
+def sweep_configs(ranges):
+    # Every combination of the given {parameter: [values]}
+    keys = sorted(ranges)
+    configs = []
+    for values in itertools.product(*(ranges[key] for key in keys)):
+        settings = dict(zip(keys, values))
+        configs.append(AiConfig(",".join(f"{key}={value}" for key, value in settings.items()), **settings))
+    return configs
+
+
+class SeenBall:
+    # What a slow-reacting AI thinks the ball's x is
+    def __init__(self):
+        self.x = 0
+
+
+class ConfiguredAi:
+    def __init__(self, config):
+        self.config = config
+        self.seen = SeenBall()
+        self.history = deque(maxlen=config.reaction + 1)
+
+    def update(self, state, player):
+        self.history.append(state.ball.x)
+        self.seen.x = self.history[0]
+        handle_ai_movement(self.seen, player, state.rng, self.config.vel, self.config.jitter)
+
+    def serve_inputs(self, state):
+        # Hold the meter until it reaches this AI's serve power
+        if not state.holding_space:
+            return INPUT_SERVE_PRESS
+        if state.power_level >= min(self.config.power, POWER_MAX) or state.power_direction < 0:
+            return INPUT_SERVE_RELEASE
+        return 0
+
+
+def call_let(state):
+    # Replays the point with the other player serving; nobody scores
+    scores = state.left_score, state.right_score
+    award_point(state, left_scored=not state.left_serve)
+    state.left_score, state.right_score = scores
+
+
+def play_match(job):
+    # Runs in a worker process; job is (index, left config, right config, seed, max ticks)
+    index, left, right, seed, max_ticks = job
+    state = MatchState(MODE_VS_PLAYER, seed)
+    left_ai = ConfiguredAi(AiConfig(**left))
+    right_ai = ConfiguredAi(AiConfig(**right))
+    rallies = []
+    rally_start = None
+    lets = 0
+
+    while not state.finished and state.tick < max_ticks:
+        inputs = 0
+        if state.serving:
+            inputs = (left_ai if state.left_serve else right_ai).serve_inputs(state)
+        else:
+            left_ai.update(state, state.left_player)
+            right_ai.update(state, state.right_player)
+        serving = state.serving
+        step(state, inputs)
+        if serving and not state.serving:
+            rally_start = state.tick
+        elif not serving and state.serving:
+            rallies.append(state.tick - rally_start)
+        elif not state.serving and state.tick - rally_start >= MAX_RALLY_TICKS:
+            call_let(state)
+            lets += 1
+
+    return {
+        "index": index,
+        "seed": seed,
+        "left": left["name"],
+        "right": right["name"],
+        "left_score": state.left_score,
+        "right_score": state.right_score,
+        "winner": {"left": left["name"], "right": right["name"]}.get(state.winner),
+        "lets": lets,
+        "ticks": state.tick,
+        "rallies": rallies,
+    }
+
+
+def match_seed(seed, index):
+    return (seed * 1000003 + index) & 0xFFFFFFFF
+
+
+def duplicate_names(configs):
+    counts = Counter(config.name for config in configs)
+    return sorted(name for name, count in counts.items() if count > 1)
+
+
+def schedule(configs, games, seed=0, max_ticks=MAX_MATCH_TICKS):
+    # Round robin; each pairing plays half its games from each end so serving first evens out
+    # Results, ratings and the report all go by name, so two configs can't share one
+    duplicates = duplicate_names(configs)
+    if duplicates:
+        raise ValueError(f"AI configuration names must be unique: {', '.join(duplicates)}")
+    jobs = []
+    for first, second in itertools.combinations(configs, 2):
+        for game in range(games):
+            left, right = (first, second) if game % 2 == 0 else (second, first)
+            index = len(jobs)
+            jobs.append((index, left.to_dict(), right.to_dict(), match_seed(seed, index), max_ticks))
+    return jobs
+
+
+def run_matches(jobs, processes=None):
+    # Yields results as matches finish, in whatever order that is
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        yield from map(play_match, jobs)
+        return
+    chunksize = max(1, len(jobs) // (processes * 8))
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(play_match, jobs, chunksize)
+
+
+def elo_ratings(results, names):
+    # Played back in schedule order, so the ratings don't depend on which process finished first
+    ratings = {name: float(ELO_START) for name in names}
+    for result in sorted(results, key=lambda result: result["index"]):
+        left, right = result["left"], result["right"]
+        expected = 1 / (1 + 10 ** ((ratings[right] - ratings[left]) / 400))
+        actual = 1.0 if result["winner"] == left else 0.0 if result["winner"] == right else 0.5
+        ratings[left] += ELO_K * (actual - expected)
+        ratings[right] -= ELO_K * (actual - expected)
+    return ratings
+
+
+def rally_distribution(lengths):
+    lengths = sorted(lengths)
+    histogram = {}
+    low = 0
+    for high in RALLY_BUCKETS + (None,):
+        label = f"{low}-{high}" if high is not None else f"{low}+"
+        histogram[label] = sum(1 for length in lengths if length >= low and (high is None or length < high))
+        low = high
+    return {
+        "count": len(lengths),
+        "mean": sum(lengths) / len(lengths) if lengths else 0.0,
+        "p10": percentile(lengths, 0.10),
+        "p50": percentile(lengths, 0.50),
+        "p90": percentile(lengths, 0.90),
+        "histogram": histogram,
+    }
+
+
+def build_report(results, configs):
+    names = [config.name for config in configs]
+    ratings = elo_ratings(results, names)
+    players = {}
+    for name in names:
+        played = [result for result in results if name in (result["left"], result["right"])]
+        wins = sum(1 for result in played if result["winner"] == name)
+        draws = sum(1 for result in played if result["winner"] is None)
+        players[name] = {
+            "config": next(config for config in configs if config.name == name).to_dict(),
+            "played": len(played),
+            "wins": wins,
+            "draws": draws,
+            "lets": sum(result["lets"] for result in played),
+            "win_rate": wins / len(played) if played else 0.0,
+            "elo": ratings[name],
+            "rallies": rally_distribution([length for result in played for length in result["rallies"]]),
+        }
+
+    head_to_head = {}
+    for result in results:
+        pairing = " vs ".join(sorted((result["left"], result["right"])))
+        record = head_to_head.setdefault(pairing, {})
+        key = result["winner"] or "draw"
+        record[key] = record.get(key, 0) + 1
+
+    return {
+        "matches": len(results),
+        "ranking": sorted(names, key=lambda name: -ratings[name]),
+        "players": players,
+        "head_to_head": head_to_head,
+        "rallies": rally_distribution([length for result in results for length in result["rallies"]]),
+    }
+
+
+def parse_sweep(specs):
+    # ["vel=2,3,4", "jitter=10,25"] -> {"vel": [2, 3, 4], "jitter": [10, 25]}
+    ranges = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        ranges[key] = [AiConfig.convert(key, value) for value in values.split(",")]
+    return ranges
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Ace Academy AI self-play tournament")
+    parser.add_argument("--ai", action="append", default=[], metavar="[NAME:]K=V,...",
+                        help="add an AI configuration (parameters: vel, jitter, reaction, power)")
+    parser.add_argument("--sweep", action="append", default=[], metavar="K=V1,V2,...",
+                        help="add every combination of these parameter values")
+    parser.add_argument("--games", type=int, default=10, help="games per pairing (default %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--max-ticks", type=int, default=MAX_MATCH_TICKS, help="ticks before a match is called a draw")
+    parser.add_argument("--results", metavar="FILE", help="append each match result to FILE as a JSON line as it finishes")
+    parser.add_argument("--report", metavar="FILE", help="write the aggregated report as JSON to FILE")
+    args = parser.parse_args(argv)
+
+    try:
+        configs = [AiConfig.parse(spec) for spec in args.ai]
+        if args.sweep:
+            configs += sweep_configs(parse_sweep(args.sweep))
+    except ValueError as error:
+        parser.error(str(error))
+    if not configs:
+        configs = sweep_configs({"vel": [2, 4], "reaction": [0, 15], "power": [1.5, 4.5]})
+    duplicates = duplicate_names(configs)
+    if duplicates:
+        parser.error(f"more than one AI configuration is named {', '.join(duplicates)}")
+    if len(configs) < 2:
+        parser.error("need at least two AI configurations")
+
+    jobs = schedule(configs, args.games, args.seed, args.max_ticks)
+    results = []
+    start = time.perf_counter()
+    results_file = open(args.results, "a") if args.results else None
+    try:
+        for result in run_matches(jobs, args.processes):
+            results.append(result)
+            if results_file is not None:
+                results_file.write(json.dumps(result) + "\n")
+                results_file.flush()
+            print(f"\r{len(results)}/{len(jobs)} matches", end="", file=sys.stderr, flush=True)
+    finally:
+        if results_file is not None:
+            results_file.close()
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    report = build_report(results, configs)
+    report["seconds"] = elapsed
+    report["matches_per_sec"] = len(results) / elapsed if elapsed else 0.0
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    print(f"{'AI':<32}{'elo':>8}{'win rate':>10}{'played':>8}{'median rally':>14}")
+    for name in report["ranking"]:
+        player = report["players"][name]
+        print(f"{name:<32}{player['elo']:8.0f}{player['win_rate']:10.1%}{player['played']:8d}{player['rallies']['p50']:14.0f}")
+    print(f"{len(results)} matches in {elapsed:.1f} s ({report['matches_per_sec']:.1f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())